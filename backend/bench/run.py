@@ -0,0 +1,295 @@
+"""
+Load and latency benchmark for the API against local upstream stubs.
+
+From ``backend/``:
+
+    python -m bench.run                                # defaults, table output
+    python -m bench.run --concurrency 1,16,64 --duration 20
+    python -m bench.run --llm-latency-ms 2000 --events 2000 --json > results.json
+    python -m bench.run --baseline results.json        # exit 1 on a regression
+
+Starts ``bench.stubs`` and ``main:app`` with uvicorn on local ports, with the API's
+upstream URLs and Perplexity base URL pointed at the stubs, waits for ``/readyz``,
+then drives each endpoint at each concurrency level for ``--duration`` seconds and
+reports throughput and p50/p95/p99 latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("retrieve", "ask", "get-event-requests", "create-event")
+ASK_QUERIES = (
+    "quietest library",
+    "top 5 least crowded gyms",
+    "which gyms are closed",
+    "where should I study tonight?",
+    "is there anything fun happening on campus?",
+)
+
+
+@dataclass
+class Result:
+    endpoint: str
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def build_request(endpoint: str, unique_queries: bool) -> Callable[[int], Tuple[str, str, Optional[Dict]]]:
+    """Returns a function from request number to (method, path, json body)."""
+    if endpoint == "retrieve":
+        return lambda n: ("GET", "/retrieve", None)
+    if endpoint == "get-event-requests":
+        return lambda n: ("GET", "/get-event-requests", None)
+    if endpoint == "ask":
+        def ask(n: int):
+            query = ASK_QUERIES[n % len(ASK_QUERIES)]
+            # A numbered suffix defeats the answer cache, so every non-local query reaches the LLM stub.
+            return "POST", "/ask", {"query": f"{query} #{n}" if unique_queries else query}
+        return ask
+    if endpoint == "create-event":
+        return lambda n: ("POST", "/create-event", {
+            "text": f"Study group {n}",
+            "start": "20250101T180000-0600",
+            "end": "20250101T190000-0600",
+            "details": "Benchmark",
+            "location": "Evans Library",
+        })
+    raise ValueError(f"unknown endpoint {endpoint!r}")
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    concurrency: int,
+    duration: float,
+    unique_queries: bool,
+) -> Result:
+    """Run ``concurrency`` closed-loop workers against one endpoint for ``duration`` seconds."""
+    make_request = build_request(endpoint, unique_queries)
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            method, path, body = make_request(counter)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return Result(
+        endpoint=endpoint,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        max_ms=round(latencies[-1], 2) if latencies else 0.0,
+    )
+
+
+# ===================== Processes ===================== #
+
+def start_server(app: str, port: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log = open(log_path, "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ===================== Reporting ===================== #
+
+def print_table(results: List[Result], upstream_calls: Dict[str, int]):
+    print(f"{'endpoint':<20}{'conc':>6}{'reqs':>9}{'errs':>7}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for r in results:
+        print(
+            f"{r.endpoint:<20}{r.concurrency:>6}{r.requests:>9}{r.errors:>7}{r.rps:>10.1f}"
+            f"{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}{r.p99_ms:>10.2f}{r.max_ms:>10.2f}"
+        )
+    print("📡 Upstream calls during the run: " + ", ".join(f"{k}={v}" for k, v in upstream_calls.items()))
+
+
+def compare(results: List[Result], baseline_path: str, threshold: float) -> List[str]:
+    """Regressions against a previous ``--json`` run: p95 up or throughput down by more than ``threshold``."""
+    with open(baseline_path) as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get((r.endpoint, r.concurrency))
+        if base is None:
+            continue
+        if base["p95_ms"] and r.p95_ms > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{r.endpoint} @{r.concurrency}: p95 {base['p95_ms']:.2f} -> {r.p95_ms:.2f} ms")
+        if base["rps"] and r.rps < base["rps"] * (1 - threshold):
+            regressions.append(f"{r.endpoint} @{r.concurrency}: rps {base['rps']:.1f} -> {r.rps:.1f}")
+        if r.errors > base["errors"]:
+            regressions.append(f"{r.endpoint} @{r.concurrency}: errors {base['errors']} -> {r.errors}")
+    return regressions
+
+
+# ===================== Main ===================== #
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Aggie Map API against local upstream stubs.")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of " + ", ".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,10,50", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per endpoint and level")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of unmeasured load before each endpoint")
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub latency of the data feeds")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="stub latency of a chat completion")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform random extra stub latency")
+    parser.add_argument("--facilities", type=int, default=12)
+    parser.add_argument("--libraries", type=int, default=6)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--unique-queries", action="store_true", help="make every /ask query distinct, bypassing the answer cache")
+    parser.add_argument("--api-port", type=int, default=8910)
+    parser.add_argument("--stub-port", type=int, default=8911)
+    parser.add_argument("--json", action="store_true", help="print results as JSON (usable as a --baseline)")
+    parser.add_argument("--baseline", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (default 0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace, api_url: str) -> List[Result]:
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=30) as client:
+        for endpoint in endpoints:
+            if args.warmup:
+                await drive(client, endpoint, min(levels), args.warmup, args.unique_queries)
+            for level in levels:
+                result = await drive(client, endpoint, level, args.duration, args.unique_queries)
+                if not args.json:
+                    print(f"⏱️  {endpoint} @{level}: {result.rps:.1f} rps, p99 {result.p99_ms:.1f} ms", file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    workdir = tempfile.mkdtemp(prefix="aggiemap-bench-")
+
+    stub_env = {
+        **os.environ,
+        "STUB_LATENCY_MS": str(args.latency_ms),
+        "STUB_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "STUB_JITTER_MS": str(args.jitter_ms),
+        "STUB_FACILITIES": str(args.facilities),
+        "STUB_LIBRARIES": str(args.libraries),
+        "STUB_EVENTS": str(args.events),
+    }
+    api_env = {
+        **os.environ,
+        "REC_API_URL": f"{stub_url}/goboard",
+        "LIBRARY_API_URL": f"{stub_url}/library",
+        "EVENTS_API_URL": f"{stub_url}/calendar",
+        "PERPLEXITY_BASE_URL": stub_url,
+        "PERPLEXITY_API_KEY": "bench",
+        "HISTORY_DIR": os.path.join(workdir, "history"),
+        "SHARED_SNAPSHOT_DIR": "",
+    }
+
+    stubs = start_server("bench.stubs:app", args.stub_port, stub_env, os.path.join(workdir, "stubs.log"))
+    api = None
+    try:
+        wait_until_ready(f"{stub_url}/calls", stubs)
+        api = start_server("main:app", args.api_port, api_env, os.path.join(workdir, "api.log"))
+        wait_until_ready(f"{api_url}/readyz", api)
+        before = httpx.get(f"{stub_url}/calls").json()
+        results = asyncio.run(run(args, api_url))
+        after = httpx.get(f"{stub_url}/calls").json()
+    except RuntimeError as e:
+        print(f"❌ {e} (logs in {workdir})", file=sys.stderr)
+        return 2
+    finally:
+        if api is not None:
+            stop(api)
+        stop(stubs)
+
+    upstream_calls = {name: after[name] - before.get(name, 0) for name in after}
+    if args.json:
+        print(json.dumps({"config": vars(args), "upstream_calls": upstream_calls, "results": [asdict(r) for r in results]}, indent=2))
+    else:
+        print_table(results, upstream_calls)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for line in regressions:
+            print(f"⚠️  Regression: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Local stand-ins for the goboard, library occupancy, calendar, and Perplexity APIs.
+
+Run with ``uvicorn bench.stubs:app --port 8900`` from ``backend/``. Latency and
+payload size come from the environment so the benchmark runner can vary them:
+
+    STUB_LATENCY_MS        base latency of the three data feeds (default 50)
+    STUB_LLM_LATENCY_MS    latency of a chat completion (default 800)
+    STUB_JITTER_MS         uniform random extra latency on every call (default 0)
+    STUB_FACILITIES        rec facilities in the goboard payload (default 12)
+    STUB_LIBRARIES         libraries in the occupancy payload (default 6)
+    STUB_EVENTS            events in the calendar payload (default 200)
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "50"))
+LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "800"))
+JITTER_MS = float(os.getenv("STUB_JITTER_MS", "0"))
+FACILITIES = int(os.getenv("STUB_FACILITIES", "12"))
+LIBRARIES = int(os.getenv("STUB_LIBRARIES", "6"))
+EVENTS = int(os.getenv("STUB_EVENTS", "200"))
+
+app = FastAPI(title="Aggie Map upstream stubs")
+calls = {"goboard": 0, "library": 0, "calendar": 0, "chat": 0}
+
+
+async def delay(base_ms: float):
+    await asyncio.sleep((base_ms + random.uniform(0, JITTER_MS)) / 1000)
+
+
+@app.get("/goboard")
+async def goboard():
+    calls["goboard"] += 1
+    await delay(LATENCY_MS)
+    return [
+        {
+            "LocationName": f"Rec Facility {i}",
+            "LastCount": random.randint(0, 200),
+            "TotalCapacity": 200,
+            "IsClosed": i % 7 == 6,
+            "LastUpdatedDateAndTime": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        for i in range(FACILITIES)
+    ]
+
+
+@app.get("/library")
+async def library():
+    calls["library"] += 1
+    await delay(LATENCY_MS)
+    payload = {"lastupdate": int(time.time())}
+    for i in range(LIBRARIES):
+        remaining = random.randint(0, 400)
+        payload[f"lib{i}"] = {
+            "name": f"Library {i}",
+            "max": 400,
+            "remaining": remaining,
+            "percentfull": round((400 - remaining) / 4),
+        }
+    return payload
+
+
+@app.get("/calendar")
+async def calendar():
+    calls["calendar"] += 1
+    await delay(LATENCY_MS)
+    # Hour-aligned so the feed only changes once an hour, like the real calendar.
+    now = int(time.time()) // 3600 * 3600
+    return {"events": {"today": [
+        {
+            "id": 10_000 + i,
+            "title": f"{random.Random(i).choice(['Career fair', 'Concert', 'Study night', 'Yoga'])} {i}",
+            "location": f"Building {i % 25}",
+            "latitude": 30.6 + (i % 50) / 1000,
+            "longitude": -96.34 - (i % 50) / 1000,
+            "ts_start": now + 900 * i,
+            "ts_end": now + 900 * i + 3600,
+            "href": f"event/{i}",
+            "summary": f"Benchmark event {i} " + "lorem ipsum " * 10,
+        }
+        for i in range(EVENTS)
+    ]}}
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    calls["chat"] += 1
+    await request.body()
+    await delay(LLM_LATENCY_MS)
+    return {
+        "id": "bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "sonar",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {
+                "role": "assistant",
+                "content": '[{"name":"Library 0","percent_full":42.0,"available_seats":120}]',
+            },
+        }],
+    }
+
+
+@app.get("/calls")
+async def call_counts():
+    """How many times each upstream was hit, to check that load does not fan out upstream."""
+    return calls
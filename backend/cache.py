@@ -0,0 +1,80 @@
+"""LRU + TTL cache with single-flight coalescing for expensive async calls."""
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation, and collapse whitespace so trivial variants share a key."""
+    return " ".join(re.sub(r"[^\w\s%]", " ", query.lower()).split())
+
+
+class AsyncLRUCache:
+    """
+    Cache async results by key for ``ttl`` seconds, keeping at most ``maxsize`` entries.
+
+    Concurrent callers asking for a key that is already being computed await
+    the same in-flight task instead of starting another one. Failures are
+    propagated to every waiter and are not cached.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 120.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return a fresh cached value or raise KeyError."""
+        expires_at, value = self._entries[key]
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            raise KeyError(key)
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, computing it at most once concurrently."""
+        try:
+            value = self.get(key)
+            self.hits += 1
+            return value
+        except KeyError:
+            pass
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._settle(key, t))
+        # Shield so one caller disconnecting does not cancel the shared computation.
+        return await asyncio.shield(task)
+
+    def _settle(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,90 @@
+"""Compact, query-relevant data context for Perplexity prompts."""
+
+import json
+import re
+from typing import List, Optional, Tuple
+
+from intents import LIBRARY_WORDS, REC_WORDS, Candidate, build_candidates
+from records import Event, FeedData
+
+DEFAULT_TOKEN_BUDGET = 1200
+CHARS_PER_TOKEN = 4  # rough average for English/JSON; only used for trimming
+EVENT_WORDS = {"event", "events", "happening", "tonight", "today", "tomorrow", "concert", "game", "fair", "talk"}
+MAX_EVENTS = 15
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def project_places(data: FeedData) -> List[Tuple[Candidate, str]]:
+    """
+    Rec facilities and libraries as (candidate, serialized row) pairs.
+
+    This only depends on the snapshot, so callers can compute it once per
+    snapshot and share it across every prompt built from that snapshot.
+    """
+    return [
+        (c, _dumps({
+            "name": c.name,
+            "category": c.category,
+            "percent_full": c.percent_full,
+            "available_seats": c.available_seats,
+            "open": not c.is_closed,
+        }))
+        for c in build_candidates(data)
+    ]
+
+
+def build_context(
+    data: FeedData,
+    query: str,
+    events: Optional[List[Event]] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    places: Optional[List[Tuple[Candidate, str]]] = None,
+) -> str:
+    """
+    Project the snapshot down to what the /ask answer schema needs and trim it to ``token_budget``.
+
+    Rec facilities and libraries become {"name", "category", "percent_full",
+    "available_seats", "open"} rows (``places``, from ``project_places``),
+    ordered so the categories the query mentions and the open places with the
+    most room come first. Events are only included when the query is about
+    events, as {"name", "title", "start"} rows taken from ``events`` (e.g. search
+    hits) or the snapshot's upcoming events, ahead of the places.
+    """
+    words = set(re.findall(r"[a-z]+", query.lower()))
+    wanted = set()
+    if words & LIBRARY_WORDS:
+        wanted.add("library")
+    if words & REC_WORDS:
+        wanted.add("rec")
+
+    ranked = sorted(places if places is not None else project_places(data), key=lambda place: (
+        bool(wanted) and place[0].category not in wanted,
+        place[0].is_closed,
+        -place[0].available_seats,
+        place[0].percent_full,
+    ))
+    rows = [row for _, row in ranked]
+
+    if words & EVENT_WORDS:
+        source = events if events else data.get("events", [])
+        # The question is about events, so they go ahead of the places when trimming.
+        rows = [
+            _dumps({"name": e.location, "title": e.title, "start": e.start_time})
+            for e in source[:MAX_EVENTS]
+        ] + rows
+
+    kept, used = [], 2  # the enclosing brackets
+    for row in rows:
+        cost = estimate_tokens(row) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(row)
+        used += cost
+    return "[" + ",".join(kept) + "]"
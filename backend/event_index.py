@@ -0,0 +1,73 @@
+"""Events kept sorted by numeric start time for windowed, paginated queries."""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from records import Event
+
+MAX_PAGE_SIZE = 200
+
+EventKey = Tuple[float, str]
+
+
+def event_key(event: Event) -> EventKey:
+    """Stable sort key: start timestamp, then the calendar id (or link) as a tie-breaker."""
+    return (float(event.ts_start), event.key)
+
+
+def encode_cursor(key: EventKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> EventKey:
+    ts, ident = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return (float(ts), str(ident))
+
+
+class EventIndex:
+    """
+    Parsed events ordered by ``ts_start``.
+
+    Windows are located with binary search, so a query costs O(log n + k) no
+    matter how large the calendar is. Cursors encode the last returned
+    (ts_start, id) key rather than a list offset, so they stay valid across
+    snapshot refreshes.
+    """
+
+    def __init__(self, events: List[Event]):
+        timed = [e for e in events if isinstance(e.ts_start, (int, float))]
+        self.events = sorted(timed, key=event_key)
+        self._keys = [event_key(e) for e in self.events]
+        self.by_key: Dict[str, Event] = {e.key: e for e in self.events}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Event]:
+        """Every event starting in [start, end), unpaginated."""
+        lo = 0 if start is None else bisect_left(self._keys, (start, ""))
+        hi = len(self._keys) if end is None else bisect_left(self._keys, (end, ""))
+        return self.events[lo:hi]
+
+    def window(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Dict:
+        """Return one page of events starting in [start, end), after ``cursor`` if given."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        lo = 0 if start is None else bisect_left(self._keys, (start, ""))
+        if cursor:
+            lo = max(lo, bisect_right(self._keys, decode_cursor(cursor)))
+        hi = len(self._keys) if end is None else bisect_left(self._keys, (end, ""))
+
+        page = self.events[lo:min(hi, lo + limit)]
+        more = lo + limit < hi
+        return {
+            "events": page,
+            "next_cursor": encode_cursor(self._keys[lo + limit - 1]) if more else None,
+        }
@@ -0,0 +1,62 @@
+"""Per-feed upstream state for conditional requests and change detection."""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+
+@dataclass
+class FeedState:
+    """Validators, content hash, and last parsed result for one upstream feed."""
+
+    name: str
+    url: str
+    parser: Callable[[Any], List[Dict]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    parsed: List[Dict] = field(default_factory=list)
+    last_checked: Optional[float] = None
+    last_changed: Optional[float] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Return If-None-Match / If-Modified-Since headers for the next request."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, status_code: int, headers: Mapping[str, str], content: bytes) -> bool:
+        """Apply an upstream response; return True only when the parsed data changed."""
+        self.last_checked = time.time()
+        if status_code == 304:
+            return False
+
+        # Upstreams that ignore validators still send identical bytes when nothing moved.
+        digest = hashlib.sha1(content).hexdigest()
+        changed = digest != self.content_hash
+        if changed:
+            # Parse before taking the new validators: if this raises, the next poll must
+            # not send them and get a 304 for a body we never managed to read.
+            self.parsed = self.parser(json.loads(content))
+            self.content_hash = digest
+            self.last_changed = self.last_checked
+
+        self.etag = headers.get("ETag") or self.etag
+        self.last_modified = headers.get("Last-Modified") or self.last_modified
+        return changed
+
+    def status(self) -> Dict[str, Any]:
+        """Summarize the feed for the /feeds endpoint."""
+        return {
+            "name": self.name,
+            "records": len(self.parsed),
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "last_checked": self.last_checked,
+            "last_changed": self.last_changed,
+        }
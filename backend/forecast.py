@@ -0,0 +1,152 @@
+"""Batched short-horizon occupancy forecasts from recorded history."""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from history import SAMPLE, OccupancyHistory
+
+SAMPLE_DTYPE = np.dtype([("ts", "<f8"), ("loc", "<u4"), ("count", "<i4"), ("capacity", "<i4")])
+assert SAMPLE_DTYPE.itemsize == SAMPLE.size
+
+SLOTS_PER_DAY = 96  # 15-minute slots
+SLOT_SECONDS = 86400 // SLOTS_PER_DAY
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+CAMPUS_TZ = ZoneInfo("America/Chicago")
+
+DEFAULT_HORIZONS = (15, 30, 60)
+MAX_HORIZON_MINUTES = 7 * 24 * 60
+
+
+def week_slots(ts: np.ndarray) -> np.ndarray:
+    """Map unix timestamps to 15-minute slots of the campus-local week (Monday 00:00 is 0)."""
+    ts = np.asarray(ts, dtype=np.float64)
+    days = np.floor(ts / 86400).astype(np.int64)
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    # One UTC-offset lookup per calendar day keeps DST correct without a per-sample loop.
+    offsets = np.array([
+        datetime.fromtimestamp(day * 86400 + 43200, CAMPUS_TZ).utcoffset().total_seconds()
+        for day in unique_days
+    ])
+    local = ts + offsets[inverse.reshape(-1)]
+    weekday = (np.floor(local / 86400).astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    slot = ((local % 86400) // SLOT_SECONDS).astype(np.int64)
+    return weekday * SLOTS_PER_DAY + slot
+
+
+class OccupancyForecaster:
+    """
+    Forecast every location at once from day-of-week / time-of-day profiles.
+
+    Per-location profile sums and counts are folded in incrementally from the
+    history file (memory-mapped, only the records added since the last refresh).
+    A forecast starts from the profile value at the target slot and adds today's
+    deviation from the profile, decaying it with the horizon. Locations or slots
+    without history fall back to the time-of-day profile, then to the current value.
+    """
+
+    def __init__(self, history: OccupancyHistory, decay_minutes: float = 45.0):
+        self.history = history
+        self.decay_minutes = decay_minutes
+        self._sums = np.zeros((0, WEEK_SLOTS))
+        self._counts = np.zeros((0, WEEK_SLOTS))
+        self._ingested = 0
+        # forecast() runs in worker threads while refresh() runs on the event loop.
+        self._lock = threading.Lock()
+        self.latest: Optional[Dict] = None
+
+    def _ingest(self):
+        """Fold history records written since the last call into the profiles. Call with ``_lock`` held."""
+        total = os.path.getsize(self.history.samples_path) // SAMPLE_DTYPE.itemsize
+        if total <= self._ingested:
+            return
+        samples = np.memmap(
+            self.history.samples_path,
+            dtype=SAMPLE_DTYPE,
+            mode="r",
+            offset=self._ingested * SAMPLE_DTYPE.itemsize,
+            shape=(total - self._ingested,),
+        )
+        valid = samples["capacity"] > 0
+        percent = samples["count"][valid] / samples["capacity"][valid] * 100.0
+        loc = samples["loc"][valid].astype(np.int64)
+        self._ingested = total
+        if not loc.size:
+            return
+
+        n_locations = max(int(loc.max()) + 1, self._sums.shape[0])
+        if n_locations > self._sums.shape[0]:
+            grow = ((0, n_locations - self._sums.shape[0]), (0, 0))
+            self._sums = np.pad(self._sums, grow)
+            self._counts = np.pad(self._counts, grow)
+
+        flat = loc * WEEK_SLOTS + week_slots(samples["ts"][valid])
+        size = n_locations * WEEK_SLOTS
+        self._sums += np.bincount(flat, weights=percent, minlength=size).reshape(n_locations, WEEK_SLOTS)
+        self._counts += np.bincount(flat, minlength=size).reshape(n_locations, WEEK_SLOTS)
+
+    def forecast(
+        self,
+        now: float,
+        counts: Sequence[Tuple[str, int, int]],
+        horizons: Sequence[int] = DEFAULT_HORIZONS,
+    ) -> Dict:
+        """Predict percent full for every (name, count, capacity) at each horizon in minutes."""
+        names = [name for name, _, _ in counts]
+        current = np.array([
+            (count / capacity) * 100 if capacity else 0.0 for _, count, capacity in counts
+        ])
+        horizon_arr = np.asarray(horizons, dtype=np.float64)
+
+        ids = np.array([self.history.location_id(name) for name in names], dtype=object)
+        with self._lock:
+            self._ingest()
+            known = np.array([i is not None and i < self._sums.shape[0] for i in ids], dtype=bool)
+            rows = np.where(known, ids, 0).astype(np.int64)
+            # Fancy indexing copies the rows, so the rest runs without the lock.
+            sums = self._sums[rows] if self._sums.shape[0] else np.zeros((len(names), WEEK_SLOTS))
+            hits = self._counts[rows] if self._counts.shape[0] else np.zeros((len(names), WEEK_SLOTS))
+        sums[~known] = 0
+        hits[~known] = 0
+        weekly = np.divide(sums, hits, out=np.full_like(sums, np.nan), where=hits > 0)
+        day_sums = sums.reshape(-1, 7, SLOTS_PER_DAY).sum(axis=1)
+        day_hits = hits.reshape(-1, 7, SLOTS_PER_DAY).sum(axis=1)
+        daily = np.divide(day_sums, day_hits, out=np.full_like(day_sums, np.nan), where=day_hits > 0)
+
+        def profile(slots: np.ndarray) -> np.ndarray:
+            value = weekly[:, slots]
+            return np.where(np.isnan(value), daily[:, slots % SLOTS_PER_DAY], value)
+
+        slots = week_slots(np.concatenate(([now], now + horizon_arr * 60)))
+        base_now = profile(slots[:1])[:, 0]
+        base_target = profile(slots[1:])
+        decay = np.exp(-horizon_arr / self.decay_minutes)
+
+        anchored = base_target + (current - base_now)[:, None] * decay
+        blended = decay * current[:, None] + (1 - decay) * base_target
+        predicted = np.where(np.isnan(base_now)[:, None], blended, anchored)
+        predicted = np.where(np.isnan(predicted), current[:, None], predicted)
+        predicted = np.round(np.clip(predicted, 0, 100), 1)
+
+        return {
+            "generated_at": now,
+            "horizons": [int(h) for h in horizons],
+            "locations": [
+                {
+                    "location": name,
+                    "percent_full": round(float(current[i]), 1),
+                    "forecast": {str(int(h)): float(predicted[i, j]) for j, h in enumerate(horizons)},
+                }
+                for i, name in enumerate(names)
+            ],
+        }
+
+    def refresh(self, counts: Sequence[Tuple[str, int, int]], now: Optional[float] = None) -> Dict:
+        """Recompute the default-horizon forecast for all locations (as of ``now``) and cache it."""
+        self.latest = self.forecast(time.time() if now is None else now, counts)
+        return self.latest
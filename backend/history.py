@@ -0,0 +1,167 @@
+"""Occupancy time-series: a recent in-memory ring plus an append-only sample file."""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# timestamp (unix seconds), location id, occupied count, capacity
+SAMPLE = struct.Struct("<dIii")
+Sample = Tuple[float, int, int, int]
+
+MAX_POINTS = 2000
+
+
+class OccupancyHistory:
+    """
+    Record rec and library counts on every refresh.
+
+    Samples are appended to ``samples.bin`` as fixed 20-byte little-endian records
+    in time order, so the file can be memory-mapped and binary-searched by
+    timestamp. Location names are interned to ids in ``locations.json``. The
+    most recent ``ring_size`` samples per location are also kept in memory so
+    dashboard-range queries never touch the disk.
+    """
+
+    def __init__(self, directory: str, ring_size: int = 2880):
+        self.directory = directory
+        self.ring_size = ring_size
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._rings: Dict[int, Deque[Sample]] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self._names_path = os.path.join(directory, "locations.json")
+        self._samples_path = os.path.join(directory, "samples.bin")
+        if os.path.exists(self._names_path):
+            with open(self._names_path) as f:
+                self._ids = json.load(f)
+
+        self._file = open(self._samples_path, "a+b")
+        # Drop a torn record left behind by a crash mid-write.
+        size = self._file.tell()
+        if size % SAMPLE.size:
+            self._file.truncate(size - size % SAMPLE.size)
+
+    @property
+    def locations(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def samples_path(self) -> str:
+        return self._samples_path
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        """Timestamp of the newest sample on disk, including ones appended by other processes."""
+        with self._lock:
+            return self._last_timestamp()
+
+    def _last_timestamp(self) -> Optional[float]:
+        # Caller holds self._lock. Appends always go to the end, so seeking here is safe.
+        size = os.fstat(self._file.fileno()).st_size
+        size -= size % SAMPLE.size
+        if not size:
+            return None
+        self._file.seek(size - SAMPLE.size)
+        return SAMPLE.unpack(self._file.read(SAMPLE.size))[0]
+
+    def location_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def reload_names(self):
+        """Re-read the name table written by another process recording into the same directory."""
+        if os.path.exists(self._names_path):
+            with open(self._names_path) as f, self._lock:
+                self._ids = json.load(f)
+
+    def _intern(self, name: str) -> int:
+        if name not in self._ids:
+            self._ids[name] = len(self._ids)
+            tmp_path = self._names_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._ids, f)
+            os.replace(tmp_path, self._names_path)
+        return self._ids[name]
+
+    def record(self, ts: float, counts: Iterable[Tuple[str, int, int]]) -> bool:
+        """
+        Append one (name, count, capacity) sample per location taken at ``ts``.
+        Readers binary-search the file by time, so samples not newer than the last
+        one on disk (e.g. a replay into a live history) are refused; returns False then.
+        """
+        with self._lock:
+            last = self._last_timestamp()
+            if last is not None and ts <= last:
+                return False
+            buffer = bytearray()
+            for name, count, capacity in counts:
+                loc_id = self._intern(name)
+                sample = (ts, loc_id, int(count), int(capacity))
+                buffer += SAMPLE.pack(*sample)
+                ring = self._rings.setdefault(loc_id, deque(maxlen=self.ring_size))
+                ring.append(sample)
+            self._file.write(buffer)
+            self._file.flush()
+        return True
+
+    def close(self):
+        self._file.close()
+
+    # ===================== READING ===================== #
+
+    def _disk_samples(self, start: float, end: float) -> Iterator[Sample]:
+        """Yield on-disk samples with ``start <= ts <= end`` via binary search on the mmap."""
+        if os.path.getsize(self._samples_path) < SAMPLE.size:
+            return
+        with open(self._samples_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            total = len(mm) // SAMPLE.size
+
+            def ts_at(i: int) -> float:
+                return SAMPLE.unpack_from(mm, i * SAMPLE.size)[0]
+
+            lo, hi = 0, total
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if ts_at(mid) < start:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            for i in range(lo, total):
+                sample = SAMPLE.unpack_from(mm, i * SAMPLE.size)
+                if sample[0] > end:
+                    break
+                yield sample
+
+    def samples(self, name: str, start: float, end: float) -> List[Sample]:
+        """Return raw samples for one location, from memory when the ring covers the range."""
+        loc_id = self._ids.get(name)
+        if loc_id is None:
+            return []
+        ring = self._rings.get(loc_id)
+        if ring and ring[0][0] <= start:
+            return [s for s in list(ring) if start <= s[0] <= end]
+        return [s for s in self._disk_samples(start, end) if s[1] == loc_id]
+
+    def query(self, name: str, start: float, end: float, step: float) -> Dict:
+        """Downsample one location's occupancy into ``step``-second buckets."""
+        step = max(step, (end - start) / MAX_POINTS, 1.0)
+        buckets: Dict[int, List[float]] = {}
+        for ts, _, count, capacity in self.samples(name, start, end):
+            percent = round((count / capacity) * 100, 1) if capacity else 0.0
+            buckets.setdefault(int((ts - start) // step), []).append(percent)
+
+        points = [
+            {
+                "ts": start + index * step,
+                "percent_full": round(sum(values) / len(values), 1),
+                "min": min(values),
+                "max": max(values),
+                "samples": len(values),
+            }
+            for index, values in sorted(buckets.items())
+        ]
+        return {"location": name, "from": start, "to": end, "step": step, "points": points}
@@ -0,0 +1,95 @@
+"""RFC 5545 iCalendar serialization for calendar events, streamed in chunks."""
+
+import hashlib
+import re
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List
+
+from records import Event
+
+PRODID = "-//The Aggie Map//Events//EN"
+CHUNK_EVENTS = 50
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT property value."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line to 75 octets, continuing with CRLF + space, without splitting a UTF-8 sequence."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74  # continuation lines spend one octet on the leading space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def utc_stamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def vevent(event: Event, dtstamp: str) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{escape_text(event.key)}@calendar.tamu.edu",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART:{utc_stamp(event.ts_start)}",
+    ]
+    if event.ts_end:
+        lines.append(f"DTEND:{utc_stamp(event.ts_end)}")
+    lines.append(f"SUMMARY:{escape_text(event.title)}")
+    if event.location:
+        lines.append(f"LOCATION:{escape_text(event.location)}")
+    summary = " ".join(TAG_RE.sub(" ", event.summary).split())
+    if summary:
+        lines.append(f"DESCRIPTION:{escape_text(summary)}")
+    if event.latitude is not None and event.longitude is not None:
+        lines.append(f"GEO:{event.latitude:.6f};{event.longitude:.6f}")
+    lines.append(f"URL:{event.link}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def calendar_etag(events: List[Event], *selector: object) -> str:
+    """Weak ETag over the selected events' content, so it only changes when the feed would."""
+    digest = hashlib.blake2b(repr(selector).encode(), digest_size=10)
+    for event in events:
+        digest.update(repr((event.key, event.ts_start, event.ts_end, event.title, event.location, event.summary)).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def stream_calendar(events: Iterable[Event], name: str, generated_at: float) -> Iterator[bytes]:
+    """Yield a VCALENDAR in chunks of ``CHUNK_EVENTS`` events; events without a start time are skipped."""
+    dtstamp = utc_stamp(generated_at)
+    yield "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        "X-WR-TIMEZONE:America/Chicago",
+    )).encode()
+    chunk = []
+    for event in events:
+        if not event.ts_start:
+            continue
+        chunk.append(vevent(event, dtstamp))
+        if len(chunk) >= CHUNK_EVENTS:
+            yield "".join(chunk).encode()
+            chunk = []
+    yield ("".join(chunk) + "END:VCALENDAR\r\n").encode()
@@ -0,0 +1,236 @@
+"""Rule-based parser and planner for the ranking questions most /ask traffic consists of."""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from records import FeedData
+from spatial import haversine_meters
+
+Coordinates = Tuple[float, float]
+
+NEAR_RADIUS_METERS = 1000
+MAX_RESULTS = 10
+
+LIBRARY_WORDS = {"library", "libraries", "study", "studying", "desk", "desks", "carrel", "carrels"}
+REC_WORDS = {
+    "gym", "gyms", "rec", "recs", "recreation", "workout", "exercise", "lift", "lifting",
+    "weights", "pool", "swim", "swimming", "court", "courts", "basketball", "climbing", "fitness",
+}
+PLACE_WORDS = {"spot", "spots", "place", "places", "location", "locations", "facility", "facilities", "seat", "seats"}
+RANK_WORDS = {
+    "best", "top", "quietest", "quiet", "least", "emptiest", "empty", "available", "open", "free",
+    "busiest", "busy", "crowded", "fullest", "packed", "most", "lowest", "highest", "closed",
+}
+# "busiest" always ranks by occupancy descending; "most"/"highest" only do next to an
+# occupancy word ("most crowded", "highest occupancy"), and "least"/"not" flip either.
+BUSY_WORDS = {"busiest", "fullest", "packed"}
+OCCUPANCY_WORDS = {"busy", "crowded", "full", "packed", "people", "occupied", "occupancy"}
+MOST_WORDS = {"most", "highest"}
+LEAST_WORDS = {"least", "lowest", "fewest"}
+NEGATION_WORDS = {"not", "no", "never"}
+FILLER_WORDS = {"the", "too", "very", "so"}
+SEAT_WORDS = {"seats", "seat", "space", "spaces", "room", "capacity", "available", "availability"}
+# Anything about events, hours, or directions needs the LLM.
+UNSUPPORTED_WORDS = {"event", "events", "happening", "tonight", "tomorrow", "hours", "directions", "how", "why", "when"}
+# Rankings describe current occupancy, so questions about another time go to the LLM too.
+TIME_WORDS = {
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "mondays", "tuesdays", "wednesdays", "thursdays", "fridays", "saturdays", "sundays",
+    "weekend", "weekends", "weekday", "weekdays", "later", "after", "before", "until",
+    "morning", "afternoon", "evening", "noon", "midnight", "yesterday",
+}
+TIME_RE = re.compile(r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.|o'?clock)|\b\d{1,2}:\d{2}\b")
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+NEAR_RE = re.compile(r"\b(?:near|nearby|close to|around|next to)\s+(?:the\s+)?(.+)$")
+COUNT_RE = re.compile(r"^(?:\d{1,2}|" + "|".join(NUMBER_WORDS) + r")$")
+
+
+@dataclass(frozen=True)
+class RankingPlan:
+    """What to rank, how to order it, and which filters apply."""
+
+    categories: FrozenSet[str]
+    count: int = 3
+    busiest: bool = False
+    by_seats: bool = False
+    closed: bool = False
+    near: Optional[str] = None
+
+
+@dataclass
+class Candidate:
+    name: str
+    category: str
+    percent_full: float
+    available_seats: int
+    is_closed: bool
+
+
+def parse_query(query: str) -> Optional[RankingPlan]:
+    """Recognize a ranking question, or return None if it should go to the LLM."""
+    if TIME_RE.search(query.lower()):
+        return None
+    text = re.sub(r"n't\b", " not", query.lower())
+    text = " ".join(re.sub(r"[^\w\s]", " ", text).split())
+    if set(text.split()) & TIME_WORDS:
+        return None
+    near = None
+    match = NEAR_RE.search(text)
+    if match:
+        near = match.group(1).strip()
+        text = text[:match.start()].strip()
+    tokens = text.split()
+    words = set(tokens)
+
+    if words & UNSUPPORTED_WORDS or not words & RANK_WORDS:
+        return None
+    categories = set()
+    if words & LIBRARY_WORDS:
+        categories.add("library")
+    if words & REC_WORDS:
+        categories.add("rec")
+    if not categories:
+        if not words & PLACE_WORDS:
+            return None
+        categories = {"library", "rec"}
+
+    modifiers = _modifiers(tokens)
+    if modifiers is None:
+        return None
+    busiest, by_seats, closed = modifiers
+    return RankingPlan(
+        categories=frozenset(categories),
+        count=max(1, min(_count(tokens), MAX_RESULTS)),
+        busiest=busiest,
+        by_seats=by_seats and not busiest,
+        closed=closed,
+        near=near,
+    )
+
+
+def _qualifier(tokens: List[str], i: int) -> str:
+    """The word qualifying ``tokens[i]``, skipping fillers ("not the busiest" -> "not")."""
+    i -= 1
+    while i >= 0 and tokens[i] in FILLER_WORDS:
+        i -= 1
+    return tokens[i] if i >= 0 else ""
+
+
+def _modifiers(tokens: List[str]) -> Optional[Tuple[bool, bool, bool]]:
+    """(busiest, by_seats, closed), or None when the ordering is ambiguous or negated in a way we can't rank."""
+    busy = quiet = seats = closed = False
+    for i, word in enumerate(tokens):
+        qualifier = _qualifier(tokens, i)
+        negated = qualifier in NEGATION_WORDS
+        if word in NEGATION_WORDS or word in FILLER_WORDS:
+            continue
+        if word == "closed":
+            closed = not negated
+        elif word == "open" and negated:
+            closed = True
+        elif word in BUSY_WORDS or word in OCCUPANCY_WORDS and qualifier in MOST_WORDS | LEAST_WORDS:
+            if negated or qualifier in LEAST_WORDS:
+                quiet = True
+            else:
+                busy = True
+        elif word in OCCUPANCY_WORDS and negated:
+            quiet = True
+        elif word in SEAT_WORDS:
+            if negated or qualifier in LEAST_WORDS:
+                return None  # "least available", "no seats": not a ranking we run
+            seats = True
+        elif negated:
+            return None
+    if busy and quiet or tokens[-1] in NEGATION_WORDS:
+        return None
+    return busy, seats, closed
+
+
+def _count(tokens: List[str]) -> int:
+    """
+    How many results were asked for: a number after "top", or one directly before
+    the places being ranked ("3 quietest libraries"), but not "for 2 people".
+    """
+    for i, word in enumerate(tokens):
+        if not COUNT_RE.match(word):
+            continue
+        if _qualifier(tokens, i) == "top":
+            return NUMBER_WORDS.get(word) or int(word)
+        for following in tokens[i + 1:]:
+            if following in LIBRARY_WORDS | REC_WORDS | PLACE_WORDS:
+                return NUMBER_WORDS.get(word) or int(word)
+            if following not in RANK_WORDS | OCCUPANCY_WORDS | LEAST_WORDS:
+                break
+    return 3
+
+
+def build_candidates(data: FeedData) -> List[Candidate]:
+    """Rec facilities and libraries from a snapshot in the /ask answer shape."""
+    candidates = [
+        Candidate(
+            name=f.name,
+            category="rec",
+            percent_full=f.percent_full,
+            available_seats=max(f.capacity - f.count, 0),
+            is_closed=f.is_closed,
+        )
+        for f in data.get("rec", [])
+    ]
+    for lib in data.get("libraries", []):
+        percent = lib.percent_full
+        candidates.append(Candidate(
+            name=lib.name,
+            category="library",
+            percent_full=percent,
+            available_seats=max(lib.remaining, 0),
+            # Matches find_best_study_spot: a full library is as good as closed.
+            is_closed=percent >= 100,
+        ))
+    return candidates
+
+
+def execute(
+    plan: RankingPlan,
+    data: FeedData,
+    locate: Callable[[str], Optional[Coordinates]],
+) -> Optional[List[Dict]]:
+    """
+    Run a plan against snapshot data. ``locate`` maps a place name to coordinates.
+    Returns None when a "near X" filter cannot be resolved (or matches nothing), so the
+    caller can defer to the LLM.
+    """
+    candidates = [
+        c for c in build_candidates(data)
+        if c.category in plan.categories and c.is_closed == plan.closed
+    ]
+
+    if plan.near:
+        origin = locate(plan.near)
+        if origin is None:
+            return None
+        nearby = []
+        for c in candidates:
+            coords = locate(c.name)
+            if coords is not None:
+                distance = haversine_meters(origin[0], origin[1], coords[0], coords[1])
+                if distance <= NEAR_RADIUS_METERS:
+                    nearby.append(c)
+        if not nearby:
+            return None
+        candidates = nearby
+
+    if plan.busiest:
+        candidates.sort(key=lambda c: (-c.percent_full, c.name))
+    elif plan.by_seats:
+        candidates.sort(key=lambda c: (-c.available_seats, c.percent_full))
+    else:
+        candidates.sort(key=lambda c: (c.percent_full, -c.available_seats))
+
+    return [
+        {"name": c.name, "percent_full": float(c.percent_full), "available_seats": int(c.available_seats)}
+        for c in candidates[:plan.count]
+    ]
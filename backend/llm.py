@@ -0,0 +1,151 @@
+"""Shared Perplexity client with bounded concurrency, deadlines, and a circuit breaker."""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from perplexity import AsyncPerplexity
+
+MODEL = "sonar"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Perplexity while the circuit breaker is open."""
+
+
+class FallbackAnswer(Exception):
+    """Raised when the model gave no usable answer; ``answer`` is the local fallback to serve uncached."""
+
+    def __init__(self, answer: str):
+        super().__init__("model gave no usable answer")
+        self.answer = answer
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures.
+    Open -> half-open after ``reset_timeout`` seconds, letting one trial call through;
+    its success closes the circuit and its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open":
+            now = time.monotonic()
+            # A trial abandoned without an outcome (e.g. a cancelled request) expires too.
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_started = None
+
+
+class PerplexityClient:
+    """
+    One long-lived ``AsyncPerplexity`` (and its connection pool) for the process.
+
+    At most ``max_concurrency`` completions run at once; each must finish within
+    ``timeout`` seconds, including time spent waiting for a slot. Failures feed
+    a circuit breaker, and while it is open calls raise ``CircuitOpenError``
+    immediately so callers can serve their fallback without waiting.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 8.0, breaker: Optional[CircuitBreaker] = None):
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional["AsyncPerplexity"] = None
+
+    def _get_client(self) -> "AsyncPerplexity":
+        if self._client is None:
+            # Imported on first use so the SDK does not slow down process startup.
+            from perplexity import AsyncPerplexity
+
+            # Retries would blow through the deadline; the breaker handles flakiness instead.
+            self._client = AsyncPerplexity(timeout=self.timeout, max_retries=0)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def status(self) -> Dict:
+        return {"circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
+
+    async def complete(self, messages: List[Dict]) -> str:
+        """Return the completion text for ``messages``."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Perplexity circuit is open")
+        try:
+            text = await asyncio.wait_for(self._complete(messages), self.timeout)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return text
+
+    async def _complete(self, messages: List[Dict]) -> str:
+        async with self._semaphore:
+            response = await self._get_client().chat.completions.create(model=MODEL, messages=messages)
+        return (response.choices[0].message.content or "").strip()
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Yield completion text pieces as they arrive, all within one deadline."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Perplexity circuit is open")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            try:
+                stream = await asyncio.wait_for(
+                    self._get_client().chat.completions.create(model=MODEL, messages=messages, stream=True),
+                    deadline - loop.time(),
+                )
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    if not chunk.choices:
+                        continue
+                    delta = getattr(chunk.choices[0], "delta", None)
+                    text = getattr(delta, "content", None) or ""
+                    if text:
+                        yield text
+            finally:
+                self._semaphore.release()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
@@ -1,69 +1,212 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import requests
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import json
+import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any
-from perplexity import Perplexity
+from typing import TYPE_CHECKING, List, Dict, Any, AsyncIterator, Optional, Tuple
 from fastapi import FastAPI
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import random
 from urllib.parse import quote
 import webbrowser
+from cache import AsyncLRUCache, normalize_query
+from context import MAX_EVENTS, build_context, project_places
+from event_index import MAX_PAGE_SIZE, EventIndex
+from feeds import FeedState
+from ical import calendar_etag, stream_calendar
+from intents import execute, parse_query
+from llm import CircuitBreaker, CircuitOpenError, FallbackAnswer, PerplexityClient
+from forecast import DEFAULT_HORIZONS, MAX_HORIZON_MINUTES, OccupancyForecaster
+from history import OccupancyHistory
+from responses import CachedBody, cached_response, dumps, etag_matches
+from records import RECORD_TYPES, Event, Facility, FeedData, Library, from_rows, to_dicts, to_rows
+from search import EventSearchIndex
+from sources import FeedSource, feed_urls, make_source
+from spatial import GridIndex, coerce_coordinates
+from snapshot import LocationChangelog, Snapshot, SnapshotStore, refresh_forever
+from stream import OccupancyBroadcaster, sse_frame
+
+if TYPE_CHECKING:
+    # shared.py needs fcntl, so it is only imported at runtime when SHARED_SNAPSHOT_DIR is set.
+    from shared import SharedSnapshotFile, SharedView
 
 load_dotenv()
 
-app = FastAPI(title="The Aggie Map API")
+REFRESH_INTERVAL_SECONDS = float(os.getenv("REFRESH_INTERVAL_SECONDS", "30"))
+RETRIEVE_MAX_AGE_SECONDS = 5
+RETRIEVE_CHANGELOG_SIZE = int(os.getenv("RETRIEVE_CHANGELOG_SIZE", "120"))
+ASK_CONTEXT_TOKENS = int(os.getenv("ASK_CONTEXT_TOKENS", "1200"))
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", "4"))
+ASK_BATCH_MAX_QUERIES = 100
+CALENDAR_LINKS_MAX_IDS = 1000
+PERPLEXITY_MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "8"))
+PERPLEXITY_TIMEOUT_SECONDS = float(os.getenv("PERPLEXITY_TIMEOUT_SECONDS", "8"))
+LOCATIONS_FILE = os.getenv(
+    "LOCATIONS_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "frontend", "src", "data", "locations.json"),
+)
+# Set to share one poller's snapshot across `uvicorn --workers N` (e.g. /dev/shm/aggiemap).
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR", "")
+SHARED_POLL_SECONDS = float(os.getenv("SHARED_POLL_SECONDS", "1"))
+HISTORY_DIR = os.getenv("HISTORY_DIR", os.path.join(os.path.dirname(__file__), "data", "history"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the first snapshot and keep it fresh in the background while the app runs.
+    Startup does not wait for the upstream APIs; /readyz reports when data is in.
+    With SHARED_SNAPSHOT_DIR set, only the worker holding the poller lease hits the upstreams.
+    """
+    shared = None
+    if SHARED_SNAPSHOT_DIR:
+        from shared import SharedSnapshotFile
+        shared = SharedSnapshotFile(SHARED_SNAPSHOT_DIR)
+    if shared is not None:
+        refresh, interval = (lambda: tracker.sync_shared(shared)), SHARED_POLL_SECONDS
+    else:
+        refresh, interval = tracker.load_all_data_async, REFRESH_INTERVAL_SECONDS
+    refresher = asyncio.create_task(refresh_forever(refresh, interval, immediate=True))
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        if shared is not None:
+            shared.close()
+        await tracker.aclose()
+
+
+app = FastAPI(title="The Aggie Map API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Snapshot-Version"],
 )
 
 class TAMUFacilityTracker:
     """Track TAMU recreation facilities, libraries, and upcoming events."""
 
-    def __init__(self):
-        self.rec_api = (
-            "https://goboardapi.azurewebsites.net/api/FacilityCount/"
-            "GetCountsByAccount?AccountAPIKey=99563b55-ae4f-4001-b384-648e0ebeaeb5"
-        )
-        self.library_api = "https://php.library.tamu.edu/utilities/occupancy/index.php"
-        self.events_api = (
-            "https://calendar.tamu.edu/live/json/events?"
-            "user_tz=America/Chicago&group=* Main University Calendar"
-        )
+    def __init__(
+        self,
+        history: Optional[OccupancyHistory] = None,
+        forecaster: Optional[OccupancyForecaster] = None,
+        llm: Optional[PerplexityClient] = None,
+        source: Optional[FeedSource] = None,
+    ):
+        # Live HTTP by default; FEED_SOURCE=record|replay swaps in a recorder or a replay.
+        self.source = source or make_source()
+        self.snapshots = SnapshotStore()
+        self.history = history
+        self.forecaster = forecaster
+        self.llm = llm or PerplexityClient()
+        self._next_poll = 0.0
+        self._history_skipped = False
+        self._context_places: Optional[Tuple[int, List[Tuple[Any, str]]]] = None
+        self.search_index = EventSearchIndex()
+        self.places = self.load_places(LOCATIONS_FILE)
+        urls = feed_urls()
+        self.feeds = {
+            "libraries": FeedState("libraries", urls["libraries"], self.parse_library_data),
+            "rec": FeedState("rec", urls["rec"], self.parse_rec_data),
+            "events": FeedState("events", urls["events"], lambda data: self.parse_event_data(data, limit=None)),
+        }
+
+    @property
+    def data(self) -> FeedData:
+        """Feed data from the current snapshot (empty feeds before the first load)."""
+        snapshot = self.snapshots.current
+        return self._data_for(snapshot)
+
+    @staticmethod
+    def _data_for(snapshot: Optional[Snapshot]) -> FeedData:
+        return snapshot.data if snapshot else {"libraries": [], "rec": [], "events": []}
 
     # ===================== FETCHING DATA ===================== #
 
-    def _get_json(self, url: str) -> Any:
-        """Safely fetch and return JSON data from a URL."""
+    def _refresh_feed(self, feed: FeedState) -> bool:
+        """Conditionally re-fetch one feed; return True if its data changed."""
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            response = self.source.fetch(feed)
+            return feed.update(response.status_code, response.headers, response.content)
         except Exception as e:
-            print(f"❌ Error fetching data from {url}: {e}")
-            return None
+            print(f"❌ Error fetching data from {feed.url}: {e}")
+            return False
+
+    async def _refresh_feed_async(self, feed: FeedState) -> bool:
+        """Async counterpart of ``_refresh_feed``."""
+        try:
+            response = await self.source.afetch(feed)
+            return feed.update(response.status_code, response.headers, response.content)
+        except Exception as e:
+            print(f"❌ Error fetching data from {feed.url}: {e}")
+            return False
+
+    async def aclose(self):
+        """Close the feed source and the Perplexity client."""
+        await self.source.aclose()
+        await self.llm.aclose()
 
-    def fetch_rec_data(self) -> List[Dict]:
+    def fetch_rec_data(self) -> List[Facility]:
         """Fetch recreation facility data."""
-        return self._get_json(self.rec_api) or []
+        self._refresh_feed(self.feeds["rec"])
+        return list(self.feeds["rec"].parsed)
 
-    def fetch_library_data(self) -> List[Dict]:
+    def fetch_library_data(self) -> List[Library]:
         """Fetch library occupancy data."""
-        data = self._get_json(self.library_api)
+        self._refresh_feed(self.feeds["libraries"])
+        return list(self.feeds["libraries"].parsed)
+
+    def fetch_event_data(self, limit: int = 20) -> List[Event]:
+        """Fetch upcoming event data from TAMU calendar."""
+        self._refresh_feed(self.feeds["events"])
+        return self.feeds["events"].parsed[:limit]
+
+    async def refresh_feeds_async(self) -> bool:
+        """Refresh every feed concurrently; return True if any of them changed."""
+        changed = await asyncio.gather(
+            *(self._refresh_feed_async(feed) for feed in self.feeds.values())
+        )
+        return any(changed)
+
+    def feed_data(self, event_limit: int = 50) -> FeedData:
+        """Return the last parsed result of every feed."""
+        return {
+            "libraries": list(self.feeds["libraries"].parsed),
+            "rec": list(self.feeds["rec"].parsed),
+            "events": self.feeds["events"].parsed[:event_limit],
+        }
+
+    # ===================== PARSING DATA ===================== #
+
+    @staticmethod
+    def parse_rec_data(data: Any) -> List[Facility]:
+        """Normalize the raw rec facility payload."""
+        if not isinstance(data, list):
+            return []
+        return [Facility.from_upstream(f) for f in data if isinstance(f, dict)]
+
+    @staticmethod
+    def parse_library_data(data: Any) -> List[Library]:
+        """Normalize the raw library occupancy payload."""
         if not data:
             return []
         if isinstance(data, dict):
-            return [v for k, v in data.items() if k != "lastupdate" and isinstance(v, dict)]
-        return data if isinstance(data, list) else []
+            data = [v for k, v in data.items() if k != "lastupdate" and isinstance(v, dict)]
+        if not isinstance(data, list):
+            return []
+        return [Library.from_upstream(lib) for lib in data if isinstance(lib, dict)]
 
-    def fetch_event_data(self, limit: int = 20) -> List[Dict]:
-        """Fetch upcoming event data from TAMU calendar."""
-        data = self._get_json(self.events_api)
+    @staticmethod
+    def parse_event_data(data: Any, limit: Optional[int] = 20) -> List[Event]:
+        """Flatten the raw TAMU calendar payload into events sorted by start time."""
         if not data:
             return []
 
@@ -80,32 +223,12 @@ class TAMUFacilityTracker:
         parsed = []
         for event in events:
             try:
-                start_ts = event.get("ts_start")
-                end_ts = event.get("ts_end")
-
-                start_time = (
-                    datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d %I:%M %p")
-                    if start_ts else "N/A"
-                )
-                end_time = (
-                    datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d %I:%M %p")
-                    if end_ts else "N/A"
-                )
-
-                parsed.append({
-                    "title": event.get("title", "Untitled Event"),
-                    "location": event.get("location", "Unknown"),
-                    "latitude": event.get("latitude", "N/A"),
-                    "longitude": event.get("longitude", "N/A"),
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "link": f"https://calendar.tamu.edu/live/{event.get('href', '')}",
-                    "summary": event.get("summary", "").strip(),
-                })
+                parsed.append(Event.from_upstream(event))
             except Exception as e:
                 print(f"⚠️ Skipped malformed event: {e}")
 
-        return sorted(parsed, key=lambda e: e["start_time"])[:limit]
+        parsed.sort(key=lambda e: (e.ts_start is None, e.ts_start or 0))
+        return parsed[:limit]
 
     # ===================== HELPERS ===================== #
 
@@ -148,23 +271,18 @@ class TAMUFacilityTracker:
             print("❌ No library data available.")
             return
 
-        libraries.sort(key=lambda x: x.get("percentfull", 0), reverse=True)
+        libraries.sort(key=lambda x: x.reported_percent, reverse=True)
 
         print("\n" + "=" * 80)
         print("📚 TAMU LIBRARIES - LIVE OCCUPANCY")
         print("=" * 80 + "\n")
 
         for lib in libraries:
-            name = lib.get("name", "Unknown")
-            max_cap = lib.get("max", 0)
-            remaining = lib.get("remaining", 0)
-            percent = lib.get("percentfull", 0)
-            current = max_cap - remaining
-            emoji = self.get_status_emoji(percent)
+            emoji = self.get_status_emoji(lib.reported_percent)
 
-            print(f"{emoji} {name} Library")
-            print(f"   Current: {current} / {max_cap} ({percent}% full)")
-            print(f"   Available: {remaining} spaces remaining\n")
+            print(f"{emoji} {lib.name} Library")
+            print(f"   Current: {lib.occupied} / {lib.capacity} ({lib.reported_percent}% full)")
+            print(f"   Available: {lib.remaining} spaces remaining\n")
 
         print("=" * 80)
 
@@ -172,17 +290,17 @@ class TAMUFacilityTracker:
         """Find least crowded open libraries."""
         libraries = [
             lib for lib in self.fetch_library_data()
-            if lib.get("percentfull", 100) < 100
+            if lib.reported_percent < 100
         ]
         if not libraries:
             print("❌ No open libraries found.")
             return
 
-        libraries.sort(key=lambda x: x.get("percentfull", 0))
+        libraries.sort(key=lambda x: x.reported_percent)
         print("\n🎯 BEST LIBRARIES TO STUDY RIGHT NOW:\n")
         for i, lib in enumerate(libraries[:3], 1):
-            print(f"{i}. {lib.get('name')} Library")
-            print(f"   {lib.get('percentfull')}% full - {lib.get('remaining')} spaces available\n")
+            print(f"{i}. {lib.name} Library")
+            print(f"   {lib.reported_percent}% full - {lib.remaining} spaces available\n")
 
     def display_rec_facilities(self, sort_by: str = "capacity"):
         """Display recreation facility occupancy."""
@@ -192,53 +310,35 @@ class TAMUFacilityTracker:
             return
 
         if sort_by == "capacity":
-            facilities.sort(
-                key=lambda x: self.calculate_percentage(
-                    x.get("LastCount", 0), x.get("TotalCapacity", 1)
-                ),
-                reverse=True,
-            )
+            facilities.sort(key=lambda x: x.percent_full, reverse=True)
         elif sort_by == "name":
-            facilities.sort(key=lambda x: x.get("LocationName", ""))
+            facilities.sort(key=lambda x: x.name)
 
         print("\n" + "=" * 80)
         print("🏋️ TAMU RECREATION FACILITIES - LIVE CAPACITY")
         print("=" * 80 + "\n")
 
         for f in facilities:
-            count = f.get("LastCount", 0)
-            cap = f.get("TotalCapacity", 1)
-            closed = f.get("IsClosed", False)
-            percent = self.calculate_percentage(count, cap)
-            emoji = self.get_status_emoji(percent, closed)
+            emoji = self.get_status_emoji(f.percent_full, f.is_closed)
 
-            print(f"{emoji} {f.get('LocationName', 'Unknown')}")
-            print(f"   Status: {'CLOSED' if closed else 'OPEN'}")
-            print(f"   Current: {count} / {cap} ({percent}%)")
-            print(f"   Updated: {self.format_datetime(f.get('LastUpdatedDateAndTime', ''))}\n")
+            print(f"{emoji} {f.name}")
+            print(f"   Status: {'CLOSED' if f.is_closed else 'OPEN'}")
+            print(f"   Current: {f.count} / {f.capacity} ({f.percent_full}%)")
+            print(f"   Updated: {self.format_datetime(f.updated)}\n")
 
         print("=" * 80)
 
     def find_best_workout_spot(self):
         """Find least crowded open rec facilities."""
-        facilities = [
-            {
-                "name": f.get("LocationName"),
-                "percentage": self.calculate_percentage(f.get("LastCount", 0), f.get("TotalCapacity", 1)),
-                "count": f.get("LastCount", 0),
-                "capacity": f.get("TotalCapacity", 1),
-            }
-            for f in self.fetch_rec_data()
-            if not f.get("IsClosed", False)
-        ]
+        facilities = [f for f in self.fetch_rec_data() if not f.is_closed]
         if not facilities:
             print("❌ All facilities are closed.")
             return
 
-        facilities.sort(key=lambda x: x["percentage"])
+        facilities.sort(key=lambda x: x.percent_full)
         print("\n🎯 BEST REC FACILITIES TO WORKOUT RIGHT NOW:\n")
         for i, f in enumerate(facilities[:5], 1):
-            print(f"{i}. {f['name']} - {f['percentage']}% full ({f['count']}/{f['capacity']})\n")
+            print(f"{i}. {f.name} - {f.percent_full}% full ({f.count}/{f.capacity})\n")
 
     def display_events(self, limit: int = 10):
         """Display upcoming TAMU events."""
@@ -252,10 +352,10 @@ class TAMUFacilityTracker:
         print("=" * 80 + "\n")
 
         for e in events:
-            print(f"📍 {e['title']}")
-            print(f"   🕒 {e['start_time']} → {e['end_time']}")
-            print(f"   📌 {e['location']} ({e['latitude']}, {e['longitude']})")
-            print(f"   🔗 {e['link']}\n")
+            print(f"📍 {e.title}")
+            print(f"   🕒 {e.start_time} → {e.end_time}")
+            print(f"   📌 {e.location} ({e.latitude or 'N/A'}, {e.longitude or 'N/A'})")
+            print(f"   🔗 {e.link}\n")
 
         print("=" * 80)
 
@@ -276,56 +376,283 @@ class TAMUFacilityTracker:
         self.find_best_study_spot()
         self.find_best_workout_spot()
 
-    def load_all_data(self):
-        self.data = {
-            "libraries": self.fetch_library_data(),
-            "rec": self.fetch_rec_data(),
-            "events": self.fetch_event_data(limit=50)
+    def load_all_data(self) -> Optional[Snapshot]:
+        """Fetch every feed and publish the result as a new snapshot."""
+        changed = [self._refresh_feed(feed) for feed in self.feeds.values()]
+        return self._publish(any(changed))
+
+    async def load_all_data_async(self) -> Optional[Snapshot]:
+        """Fetch every feed concurrently and publish the result as a new snapshot."""
+        return self._publish(await self.refresh_feeds_async())
+
+    def _publish(self, changed: bool) -> Optional[Snapshot]:
+        """
+        Record this refresh's counts, then publish the feeds if anything changed.
+        Times come from the source's clock, so a replay records its original times.
+        Nothing is published until at least one feed has parsed, so /readyz stays 503
+        while every upstream is failing.
+        """
+        if all(feed.last_changed is None for feed in self.feeds.values()):
+            print("⚠️ No feed has loaded yet; not publishing a snapshot")
+            return None
+        now = self.source.clock()
+        counts = self.occupancy_counts(self.feed_data())
+        # History only accepts samples newer than what is on disk, so a replay that is
+        # behind the file (or parked on its last recording) records nothing.
+        if self.history is not None and not self.history.record(now, counts) and not self._history_skipped:
+            print(f"⚠️ Not recording history: {now:.0f} is not newer than the last sample on disk")
+            self._history_skipped = True
+        if self.forecaster is not None:
+            self.forecaster.refresh(counts, now)
+
+        current = self.snapshots.current
+        if current is not None and not changed:
+            return current
+
+        data = self.feed_data(event_limit=50)
+        locations = self.build_locations(data)
+        snapshot = self.snapshots.publish(
+            data,
+            locations,
+            self.build_indexes(),
+            bodies={
+                "retrieve": CachedBody.from_payload(locations),
+                "event_requests": CachedBody.from_payload(self.build_event_requests(data["events"][:10])),
+            },
+            created_at=now,
+        )
+        print(f"✅ All data loaded successfully! (snapshot v{snapshot.version})")
+        return snapshot
+
+    # ===================== SHARED SNAPSHOT ===================== #
+
+    async def sync_shared(self, shared: "SharedSnapshotFile"):
+        """
+        One tick of multi-worker mode. The worker holding the poller lease refreshes
+        the upstream feeds every REFRESH_INTERVAL_SECONDS and writes new snapshots to
+        ``shared``; every other worker adopts whatever newer snapshot is there.
+        """
+        current = self.snapshots.current
+        view = shared.read_newer(current.version if current else 0)
+        if view is not None:
+            self.adopt_shared(view)
+        if not shared.lease.acquire():
+            return
+
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + REFRESH_INTERVAL_SECONDS
+        snapshot = await self.load_all_data_async()
+        if snapshot is not None and snapshot.version > shared.version:
+            shared.write(snapshot.version, snapshot.created_at, self.shared_sections(snapshot))
+
+    def shared_sections(self, snapshot: Snapshot) -> Dict[str, bytes]:
+        """Serialize a snapshot for ``SharedSnapshotFile``: full parsed feeds plus every cached body."""
+        sections = {"feeds": dumps({name: to_rows(feed.parsed) for name, feed in self.feeds.items()})}
+        metas = {}
+        for name, body in snapshot.bodies.items():
+            metas[name], body_sections = body.to_sections(name)
+            sections.update(body_sections)
+        sections["bodies"] = dumps(metas)
+        return sections
+
+    def adopt_shared(self, view: "SharedView") -> Snapshot:
+        """Publish a snapshot another worker wrote, serving its bodies straight from the mapping."""
+        for name, rows in json.loads(bytes(view.sections["feeds"])).items():
+            self.feeds[name].parsed = from_rows(RECORD_TYPES[name], rows)
+        counts = self.occupancy_counts(self.feed_data())
+        if self.history is not None:
+            self.history.reload_names()  # the poller records samples; followers only read them
+        if self.forecaster is not None:
+            self.forecaster.refresh(counts, view.created_at)
+
+        bodies = {
+            name: CachedBody.from_sections(name, meta, view.sections)
+            for name, meta in json.loads(bytes(view.sections["bodies"])).items()
         }
-        print("✅ All data loaded successfully!")
-    
-    def get_all_locations_with_events(self) -> List[Dict[str, float]]:
+        return self.snapshots.publish(
+            self.feed_data(event_limit=50),
+            json.loads(bytes(view.sections["retrieve.body"])),
+            self.build_indexes(),
+            bodies=bodies,
+            version=view.version,
+            created_at=view.created_at,
+        )
+
+    def build_indexes(self) -> Dict[str, Any]:
+        """Build the query indexes that ride along with each snapshot."""
+        events = self.feeds["events"].parsed
+        # Each snapshot gets its own search index; unchanged postings are shared with the last one.
+        self.search_index = self.search_index.updated(events)
+        return {
+            "events": EventIndex(events),
+            "search": self.search_index,
+            "spatial": GridIndex(self.spatial_points(events)),
+        }
+
+    @staticmethod
+    def load_places(path: str) -> List[Dict]:
+        """Load the static campus locations shared with the frontend."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load campus locations from {path}: {e}")
+            return []
+
+    def spatial_points(self, events: List[Event]) -> List[Dict]:
+        """Campus locations and geotagged events as points for the spatial index."""
+        live = {
+            name.lower(): percent
+            for name, count, capacity in self.occupancy_counts(self.feed_data())
+            if capacity
+            for percent in [round((count / capacity) * 100, 1)]
+        }
+        points = []
+        for place in self.places:
+            coords = coerce_coordinates(place.get("lat"), place.get("lng"))
+            if coords is None:
+                continue
+            name = place.get("name", "")
+            # Static entries like "Evans Library (4th Floor Quiet)" take the live reading for "Evans".
+            percent = next(
+                (value for live_name, value in live.items() if live_name and live_name in name.lower()),
+                place.get("currentBusyScore"),
+            )
+            points.append({
+                "kind": "location",
+                "id": place.get("id"),
+                "name": name,
+                "category": place.get("category"),
+                "lat": coords[0],
+                "lng": coords[1],
+                "percent_full": percent,
+            })
+        for event in events:
+            if event.latitude is None or event.longitude is None:
+                continue
+            points.append({
+                "kind": "event",
+                "id": event.id,
+                "name": event.title,
+                "location": event.location,
+                "ts_start": event.ts_start,
+                "lat": event.latitude,
+                "lng": event.longitude,
+                "percent_full": self.estimate_event_occupancy(event),
+            })
+        return points
+
+    @staticmethod
+    def occupancy_counts(data: FeedData) -> List[Tuple[str, int, int]]:
+        """Return (name, occupied, capacity) for every rec facility and library."""
+        counts = [(f.name, f.count, f.capacity) for f in data.get("rec", [])]
+        counts.extend((lib.name, lib.occupied, lib.capacity) for lib in data.get("libraries", []))
+        return counts
+
+    def build_locations(self, data: FeedData) -> List[Dict[str, float]]:
         """
         Returns a list of dictionaries with location and occupancy percentage for:
         - Rec facilities (real occupancy)
         - Libraries (real occupancy)
-        - Events (random capacities since actual occupancy is unknown)
-        
-        Example: [{"location": "Rec Center", "percent_full": 60.0}, ...]
+        - Events (deterministic estimates since actual occupancy is unknown)
+
+        Each entry has a stable ``id`` ("rec:<name>", "library:<name>", "event:<key>")
+        that deltas (/retrieve?since=, /retrieve/stream) refer to, since several
+        events can share one venue name.
+
+        Example: [{"id": "rec:Rec Center", "location": "Rec Center", "percent_full": 60.0}, ...]
         """
         result = []
 
         # --- Rec Facilities ---
-        rec_facilities = self.fetch_rec_data()
-        for f in rec_facilities:
-            name = f.get("LocationName", "Unknown")
-            current = f.get("LastCount", 0)
-            total = f.get("TotalCapacity", 1)  # avoid division by zero
-            percent = round((current / total) * 100, 1)
-            result.append({"location": name, "percent_full": percent})
+        for f in data.get("rec", []):
+            result.append({"id": f"rec:{f.name}", "location": f.name, "percent_full": f.percent_full})
 
         # --- Libraries ---
-        libraries = self.fetch_library_data()
-        for lib in libraries:
-            name = lib.get("name", "Unknown")
-            max_cap = lib.get("max", 1)  # avoid division by zero
-            remaining = lib.get("remaining", 0)
-            current = max_cap - remaining
-            percent = round((current / max_cap) * 100, 1)
-            result.append({"location": name, "percent_full": percent})
+        for lib in data.get("libraries", []):
+            result.append({"id": f"library:{lib.name}", "location": lib.name, "percent_full": lib.percent_full})
 
         # --- Events ---
-        events = self.fetch_event_data(limit=50)
-        for event in events:
+        for event in data.get("events", []):
             # Use the event's location as the location name
-            location_name = event.get("location", "Unknown Event Location")
-            # Random occupancy percentage between 10% and 100%
-            percent = round(random.uniform(10, 100), 1)
-            result.append({"location": location_name, "percent_full": percent})
+            result.append({
+                "id": f"event:{event.key}",
+                "location": event.location,
+                "percent_full": self.estimate_event_occupancy(event),
+            })
 
         return result
 
-    def ask_perplexity(self, prompt: str) -> str:
+    @staticmethod
+    def build_event_requests(events: List[Event]) -> List[Dict]:
+        """Events in the /create-event (Google Calendar) shape served by /get-event-requests."""
+        formatted_events = []
+        for event in events:
+            # RFC5545-compliant Google Calendar format in campus time: YYYYMMDDTHHMMSS±HHMM
+            times = event.calendar_times()
+            if times is None:
+                print(f"⚠️ Skipped untimed event: {event.title}")
+                continue
+            formatted_events.append({
+                "text": event.title,
+                "start": times[0],
+                "end": times[1],
+                "details": event.summary,
+                "location": event.location,
+            })
+        return formatted_events
+
+    @staticmethod
+    def estimate_event_occupancy(event: Event) -> float:
+        """
+        Stand-in occupancy (10-100%) for an event, since the calendar has no counts.
+        Derived from the event's identity so identical data always serializes identically.
+        """
+        key = f"{event.key}|{event.ts_start}".encode()
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        return round(10 + (digest % 901) / 10, 1)
+
+    def get_all_locations_with_events(self) -> List[Dict[str, float]]:
+        """Return the precomputed location occupancy list from the current snapshot."""
+        snapshot = self.snapshots.current
+        return snapshot.locations if snapshot else []
+
+    def locate(self, name: str) -> Optional[Tuple[float, float]]:
+        """Coordinates of a campus place, matched loosely by name or id (e.g. "evans", "PEAP")."""
+        needle = " ".join(name.lower().split())
+        if not needle:
+            return None
+        for place in self.places:
+            place_name = place.get("name", "").lower()
+            if needle in place_name or place_name in needle or needle == str(place.get("id", "")).lower():
+                coords = coerce_coordinates(place.get("lat"), place.get("lng"))
+                if coords is not None:
+                    return coords
+        return None
+
+    # The /ask methods below take an optional ``snapshot`` so one request (or a whole
+    # batch) reads a single data version; without it they use the current snapshot.
+
+    def answer_locally(self, prompt: str, snapshot: Optional[Snapshot] = None) -> Optional[str]:
+        """Answer ranking questions straight from the snapshot; None means ask the LLM."""
+        plan = parse_query(prompt)
+        if plan is None:
+            return None
+        results = execute(plan, self._data_for(snapshot or self.snapshots.current), self.locate)
+        return json.dumps(results) if results is not None else None
+
+    def context_places(self, snapshot: Optional[Snapshot] = None) -> List[Tuple[Any, str]]:
+        """Serialized prompt rows for a snapshot, built once per version and shared by every /ask."""
+        snapshot = snapshot or self.snapshots.current
+        version = snapshot.version if snapshot else 0
+        if self._context_places is None or self._context_places[0] != version:
+            self._context_places = (version, project_places(self._data_for(snapshot)))
+        return self._context_places[1]
+
+    def _ask_messages(self, prompt: str, snapshot: Optional[Snapshot] = None) -> List[Dict]:
+        """Build the system and user messages for a Perplexity call."""
 
         # System prompt: strict instructions to return valid JSON (string) only.
         system_prompt = """
@@ -344,11 +671,16 @@ class TAMUFacilityTracker:
           [{"name":"Library A","percent_full":12.5,"available_seats":120}, {"name":"Rec B","percent_full":45.0,"available_seats":60}]
         """
 
-        # Embed sanitized live data for the model to use
-        try:
-            embedded_data = json.dumps(self.data, default=str)
-        except Exception:
-            embedded_data = str(self.data)
+        # Embed only the fields the answer needs, most relevant rows first, within a token budget
+        snapshot = snapshot or self.snapshots.current
+        search = snapshot.indexes["search"] if snapshot else self.search_index
+        embedded_data = build_context(
+            self._data_for(snapshot),
+            prompt,
+            events=[event for event, _ in search.search(prompt, limit=MAX_EVENTS)],
+            token_budget=ASK_CONTEXT_TOKENS,
+            places=self.context_places(snapshot),
+        )
 
         user_message = {
             "role": "user",
@@ -364,15 +696,58 @@ class TAMUFacilityTracker:
     """
         }
 
-        messages = [{"role": "system", "content": system_prompt}, user_message]
+        return [{"role": "system", "content": system_prompt}, user_message]
 
-        client = Perplexity()
+    async def ask_perplexity(self, prompt: str, snapshot: Optional[Snapshot] = None) -> str:
+        """Ask Perplexity over the shared client; falls back to local data on any failure."""
         try:
-            response = client.chat.completions.create(model="sonar", messages=messages)
-            resp_text = response.choices[0].message.content.strip()
-        except Exception:
+            return await self.ask_model(prompt, snapshot)
+        except FallbackAnswer as e:
+            return e.answer
+
+    async def ask_model(self, prompt: str, snapshot: Optional[Snapshot] = None) -> str:
+        """
+        Like ``ask_perplexity``, but raises FallbackAnswer (carrying the local
+        fallback) when the model gave no usable answer, so callers can avoid caching it.
+        """
+        try:
+            resp_text = await self.llm.complete(self._ask_messages(prompt, snapshot))
+        except CircuitOpenError:
+            resp_text = ""
+        except Exception as e:
+            print(f"❌ Perplexity request failed: {e!r}")
             resp_text = ""
 
+        answer = self.parse_answer(resp_text)
+        if answer is None:
+            raise FallbackAnswer(self.fallback_answer(snapshot))
+        return answer
+
+    async def ask_perplexity_stream(self, prompt: str, snapshot: Optional[Snapshot] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yield ("token", text) pieces as Perplexity streams them, then one
+        ("result", json) with the validated answer, or ("fallback", json) with
+        the local fallback when the model gave no usable answer.
+        """
+        pieces = []
+        try:
+            async for text in self.llm.stream(self._ask_messages(prompt, snapshot)):
+                pieces.append(text)
+                yield "token", text
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            print(f"❌ Perplexity stream failed: {e!r}")
+
+        answer = self.parse_answer("".join(pieces).strip())
+        if answer is None:
+            yield "fallback", self.fallback_answer(snapshot)
+        else:
+            yield "result", answer
+
+    def parse_answer(self, resp_text: str) -> Optional[str]:
+        """The model output normalized to a JSON array of up to 3 answers, or None if it is not one."""
+
         # Try to parse the model output as JSON. If it fails, attempt to extract a JSON array substring.
         def try_parse_json(s: str):
             try:
@@ -400,84 +775,416 @@ class TAMUFacilityTracker:
                     name, percent, available = "", 0.0, 0
                 normalized.append({"name": name, "percent_full": percent, "available_seats": available})
             return json.dumps(normalized)
-        else:
-            # Fallback: build a deterministic top-3 list from local data (guaranteed JSON string)
-            candidates = []
+        return None
+
+    def fallback_answer(self, snapshot: Optional[Snapshot] = None) -> str:
+        """Build a deterministic top-3 list from local data (guaranteed JSON string)."""
+        data = self._data_for(snapshot or self.snapshots.current)
+        candidates = []
+
+        # Rec facilities
+        for f in data["rec"]:
+            candidates.append({
+                "name": f.name,
+                "percent_full": f.percent_full,
+                "available_seats": max(f.capacity - f.count, 0),
+            })
+
+        # Libraries
+        for lib in data["libraries"]:
+            candidates.append({
+                "name": lib.name,
+                "percent_full": lib.percent_full,
+                "available_seats": max(lib.remaining, 0),
+            })
+
+        # Events (no reliable capacity) - skip or include with 0 available seats
+        for ev in data["events"][:20]:
+            # We don't have capacity; set available_seats to 0 and treat the event as full
+            candidates.append({"name": ev.location, "percent_full": 100.0, "available_seats": 0})
+
+        # Sort by available_seats descending (most available spots first), then by percent_full ascending
+        candidates.sort(key=lambda x: (-int(x.get("available_seats", 0)), float(x.get("percent_full", 100.0))))
+        top3 = candidates[:3]
+
+        # Ensure correct types and return JSON string
+        safe_top3 = []
+        for it in top3:
+            try:
+                safe_top3.append({
+                    "name": str(it.get("name", "")),
+                    "percent_full": float(it.get("percent_full", 0.0)),
+                    "available_seats": int(it.get("available_seats", 0))
+                })
+            except Exception:
+                safe_top3.append({"name": "", "percent_full": 0.0, "available_seats": 0})
 
-            # Rec facilities
-            for f in self.fetch_rec_data():
-                try:
-                    name = f.get("LocationName", "Unknown")
-                    current = int(f.get("LastCount", 0))
-                    cap = int(f.get("TotalCapacity", 1)) or 1
-                    available = max(cap - current, 0)
-                    percent = round((current / cap) * 100, 1)
-                    candidates.append({"name": name, "percent_full": percent, "available_seats": available})
-                except Exception:
-                    continue
+        return json.dumps(safe_top3)
 
-            # Libraries
-            for lib in self.fetch_library_data():
-                try:
-                    name = lib.get("name", "Unknown")
-                    max_cap = int(lib.get("max", 1)) or 1
-                    remaining = int(lib.get("remaining", 0))
-                    current = max_cap - remaining
-                    available = max(remaining, 0)
-                    percent = round((current / max_cap) * 100, 1)
-                    candidates.append({"name": name, "percent_full": percent, "available_seats": available})
-                except Exception:
-                    continue
 
-            # Events (no reliable capacity) - skip or include with 0 available seats
-            for ev in self.fetch_event_data(limit=20):
-                try:
-                    name = ev.get("location", "Event Location")
-                    # We don't have capacity; set available_seats to 0 and percent_full to provided percent if any (else random-ish not allowed)
-                    candidates.append({"name": name, "percent_full": float(ev.get("percent_full", 100.0)) if isinstance(ev, dict) and "percent_full" in ev else 100.0, "available_seats": 0})
-                except Exception:
-                    continue
+# Build the tracker; the lifespan task loads its first snapshot once the app is serving
+history = OccupancyHistory(HISTORY_DIR)
+tracker = TAMUFacilityTracker(
+    history=history,
+    forecaster=OccupancyForecaster(history),
+    llm=PerplexityClient(
+        max_concurrency=PERPLEXITY_MAX_CONCURRENCY,
+        timeout=PERPLEXITY_TIMEOUT_SECONDS,
+        breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+    ),
+)
+broadcaster = OccupancyBroadcaster()
+tracker.snapshots.add_listener(broadcaster.on_publish)
+changelog = LocationChangelog(maxlen=RETRIEVE_CHANGELOG_SIZE)
+tracker.snapshots.add_listener(changelog.on_publish)
 
-            # Sort by available_seats descending (most available spots first), then by percent_full ascending
-            candidates.sort(key=lambda x: (-int(x.get("available_seats", 0)), float(x.get("percent_full", 100.0))))
-            top3 = candidates[:3]
+# Request body model
+class QueryRequest(BaseModel):
+    query: str
 
-            # Ensure correct types and return JSON string
-            safe_top3 = []
-            for it in top3:
-                try:
-                    safe_top3.append({
-                        "name": str(it.get("name", "")),
-                        "percent_full": float(it.get("percent_full", 0.0)),
-                        "available_seats": int(it.get("available_seats", 0))
-                    })
-                except Exception:
-                    safe_top3.append({"name": "", "percent_full": 0.0, "available_seats": 0})
+ask_cache = AsyncLRUCache(
+    maxsize=int(os.getenv("ASK_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("ASK_CACHE_TTL_SECONDS", "120")),
+)
 
-            return json.dumps(safe_top3)
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
 
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once the first snapshot is loaded, 503 until then."""
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready", "version": snapshot.version, "age_seconds": round(time.time() - snapshot.published_at, 1)}
 
+@app.post("/ask")
+async def ask_perplexity(request: QueryRequest, stream: bool = False):
+    """
+    Answer a campus question as a JSON array string of {name, percent_full, available_seats}.
+    With `?stream=true` the answer is sent as server-sent events: "token" events with
+    model output as it arrives, then one "result" event carrying the validated array.
+    """
+    snapshot = tracker.snapshots.current
+    local = tracker.answer_locally(request.query, snapshot)
+
+    if stream:
+        return StreamingResponse(
+            stream_answer(request.query, snapshot, local),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-# Load tracker and data once at startup
-tracker = TAMUFacilityTracker()
-tracker.load_all_data()
+    return {"response": await answer_query(request.query, snapshot, local)}
 
-# Request body model
-class QueryRequest(BaseModel):
-    query: str
 
-@app.post("/ask")
-def ask_perplexity(request: QueryRequest):
-    result = tracker.ask_perplexity(request.query)
-    return {"response": result}
+def ask_key(query: str, snapshot: Optional[Snapshot]) -> Tuple:
+    # Answers only depend on the query and the data, so key on both; identical
+    # concurrent questions share one Perplexity call.
+    return (snapshot.version if snapshot else 0, normalize_query(query))
+
+
+async def answer_query(query: str, snapshot: Optional[Snapshot], local: Optional[str]) -> str:
+    """
+    Local intent answer if there is one, otherwise a cached or coalesced Perplexity
+    call whose prompt is built from ``snapshot``, the version it is cached under.
+    """
+    if local is not None:
+        return local
+    try:
+        return await ask_cache.get_or_compute(ask_key(query, snapshot), lambda: tracker.ask_model(query, snapshot))
+    except FallbackAnswer as e:
+        return e.answer  # not cached, so the next ask retries the model
 
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    concurrency: Optional[int] = None
+
+@app.post("/ask/batch")
+async def ask_batch(request: BatchQueryRequest):
+    """
+    Answer many queries against one snapshot, at most `concurrency` at a time
+    (capped at ASK_BATCH_CONCURRENCY). Results come back in request order with
+    per-item timing; one failing query does not fail the batch.
+    """
+    if len(request.queries) > ASK_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {ASK_BATCH_MAX_QUERIES} queries per batch")
+
+    snapshot = tracker.snapshots.current
+    tracker.context_places(snapshot)  # serialize the shared prompt rows once, up front
+    semaphore = asyncio.Semaphore(max(1, min(request.concurrency or ASK_BATCH_CONCURRENCY, ASK_BATCH_CONCURRENCY)))
+
+    async def run(query: str) -> Dict:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                local = tracker.answer_locally(query, snapshot)
+                response, error = await answer_query(query, snapshot, local), None
+            except Exception as e:
+                response, error = None, f"{type(e).__name__}: {e}"
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {"query": query, "response": response, "error": error, "elapsed_ms": elapsed_ms}
+
+    results = await asyncio.gather(*(run(query) for query in request.queries))
+    return {"version": snapshot.version if snapshot else None, "results": results}
+
+
+async def stream_answer(query: str, snapshot: Optional[Snapshot], local: Optional[str]) -> AsyncIterator[bytes]:
+    """SSE body for a streamed /ask; local and cached answers go straight to the result event."""
+    key = ask_key(query, snapshot)
+    if local is None:
+        try:
+            local = ask_cache.get(key)
+        except KeyError:
+            pass
+    if local is not None:
+        yield sse_frame("result", {"response": local})
+        return
+
+    async for kind, text in tracker.ask_perplexity_stream(query, snapshot):
+        if kind == "token":
+            yield sse_frame("token", {"text": text})
+        else:
+            if kind == "result":
+                ask_cache.put(key, text)  # fallbacks are not cached
+            yield sse_frame("result", {"response": text})
+
+
+@app.get("/feeds")
+async def feed_status():
+    """
+    Report when each upstream feed was last checked and last actually changed.
+    """
+    return [feed.status() for feed in tracker.feeds.values()]
+
+
+SNAPSHOT_SECTIONS = ("meta", "locations", "rec", "libraries", "events", "places")
+snapshot_bodies = AsyncLRUCache(maxsize=64, ttl=3600)
+
+def snapshot_section(snapshot: Snapshot, name: str) -> Any:
+    """One /snapshot section, all read from the same snapshot."""
+    if name == "meta":
+        return {
+            "version": snapshot.version,
+            "created_at": snapshot.created_at,
+            "counts": {key: len(value) for key, value in snapshot.data.items()},
+        }
+    if name == "locations":
+        return snapshot.locations
+    if name == "places":
+        return tracker.places
+    return to_dicts(snapshot.data[name])
+
+@app.get("/snapshot")
+async def get_snapshot(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated sections to include"),
+    sections: Optional[str] = Query(None, description="Alias of fields"),
+):
+    """
+    Rec facilities, libraries, events, the /retrieve locations, and the static campus
+    places in one response, all from a single snapshot version. `fields` (or `sections`)
+    picks a subset, e.g. `?fields=locations,events`; "version" is always included.
+    Bodies are serialized once per version and selection and honor If-None-Match.
+    """
+    selector = fields or sections
+    names = tuple(SNAPSHOT_SECTIONS)
+    if selector:
+        requested = {name.strip() for name in selector.split(",") if name.strip()}
+        unknown = requested - set(SNAPSHOT_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sections {sorted(unknown)}; choose from {list(SNAPSHOT_SECTIONS)}",
+            )
+        names = tuple(name for name in SNAPSHOT_SECTIONS if name in requested)
+
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="No snapshot loaded yet")
+    key = (snapshot.version, names)
+    try:
+        body = snapshot_bodies.get(key)
+    except KeyError:
+        payload = {"version": snapshot.version}
+        payload.update({name: snapshot_section(snapshot, name) for name in names})
+        body = CachedBody.from_payload(payload)
+        snapshot_bodies.put(key, body)
+    return cached_response(request, body, RETRIEVE_MAX_AGE_SECONDS)
+
+retrieve_deltas = AsyncLRUCache(maxsize=256, ttl=3600)
+
 @app.get("/retrieve")
-def retrieve_locations():
+async def retrieve_locations(request: Request, since: Optional[int] = Query(None, ge=0, le=2**53)):
     """
     Retrieve all locations (rec facilities, libraries, events) with occupancy percentages.
+    Served from a body serialized once per snapshot; send If-None-Match to get a 304 when unchanged.
+    The snapshot version is in the X-Snapshot-Version header.
+
+    With `?since=<version>` the response is {"version", "since", "full": false, "added",
+    "changed", "removed"} holding only the entries (by id) that differ from that
+    version, or {"version", "since", "full": true, "locations"} when `since` is too
+    old for the changelog. `?since=0` always returns the full list with its version.
+    """
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return []
+    if since is None:
+        body = snapshot.bodies["retrieve"]
+    else:
+        key = (since, snapshot.version)
+        try:
+            body = retrieve_deltas.get(key)
+        except KeyError:
+            delta = changelog.since(since, snapshot.version)
+            if delta is None:
+                payload = {"version": snapshot.version, "since": since, "full": True, "locations": snapshot.locations}
+            else:
+                payload = {"version": snapshot.version, "since": since, "full": False, **delta}
+            body = CachedBody.from_payload(payload)
+            retrieve_deltas.put(key, body)
+    response = cached_response(request, body, RETRIEVE_MAX_AGE_SECONDS)
+    response.headers["X-Snapshot-Version"] = str(snapshot.version)
+    return response
+
+@app.get("/retrieve/stream")
+async def stream_locations():
+    """
+    Server-sent events: a full "snapshot" on connect, then after each refresh a "delta"
+    with the entries (by id) that were added or changed and the ids removed, or a new
+    "snapshot" when the ids are ambiguous.
+    """
+    return StreamingResponse(
+        broadcaster.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/history")
+async def occupancy_history(
+    location: str,
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    step: float = 300,
+):
+    """
+    Downsampled occupancy for one rec facility or library.
+    `from`/`to` are unix seconds (default: the last 24 hours); `step` is the bucket size in seconds.
+    """
+    if tracker.history.location_id(location) is None:
+        raise HTTPException(status_code=404, detail=f"No history recorded for {location!r}")
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 24 * 3600
+    return await asyncio.to_thread(tracker.history.query, location, start, end, step)
+
+@app.get("/forecast")
+async def occupancy_forecast(horizons: Optional[str] = None):
     """
-    return tracker.get_all_locations_with_events()
+    Predicted percent full for every rec facility and library.
+    `horizons` is a comma-separated list of minutes ahead (default 15,30,60), each 1..10080.
+    """
+    if horizons:
+        try:
+            minutes = [int(h) for h in horizons.split(",") if h.strip()]
+        except ValueError:
+            raise HTTPException(status_code=422, detail="horizons must be comma-separated minutes")
+        if not minutes or not all(1 <= m <= MAX_HORIZON_MINUTES for m in minutes):
+            raise HTTPException(status_code=422, detail=f"horizons must be between 1 and {MAX_HORIZON_MINUTES} minutes")
+    else:
+        minutes = list(DEFAULT_HORIZONS)
+
+    if minutes == list(DEFAULT_HORIZONS) and tracker.forecaster.latest is not None:
+        result = tracker.forecaster.latest
+    else:
+        counts = tracker.occupancy_counts(tracker.data)
+        result = await asyncio.to_thread(tracker.forecaster.forecast, time.time(), counts, minutes)
+
+    rec_names = {f.name for f in tracker.data["rec"]}
+    locations = [
+        {**item, "category": "rec" if item["location"] in rec_names else "library"}
+        for item in result["locations"]
+    ]
+    return {**result, "locations": locations}
+
+@app.get("/events")
+async def list_events(
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Events starting in [`from`, `to`) (unix seconds), ordered by start time.
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page.
+    """
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return {"version": None, "events": [], "next_cursor": None}
+    try:
+        page = snapshot.indexes["events"].window(start, end, cursor, limit)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"version": snapshot.version, "events": to_dicts(page["events"]), "next_cursor": page["next_cursor"]}
+
+@app.get("/events/search")
+async def search_events(q: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    Keyword search over event titles, locations, and summaries.
+    The last word may be a prefix, so this works for search-as-you-type.
+    """
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return {"version": None, "query": q, "results": []}
+    results = [{**event.to_dict(), "score": score} for event, score in snapshot.indexes["search"].search(q, limit)]
+    return {"version": snapshot.version, "query": q, "results": results}
+
+def occupancy_filter(max_occupancy: Optional[float], kind: Optional[str]):
+    """Predicate for spatial queries; points with unknown occupancy pass the occupancy check."""
+    def keep(point: Dict) -> bool:
+        if kind and point["kind"] != kind:
+            return False
+        percent = point.get("percent_full")
+        return max_occupancy is None or percent is None or percent <= max_occupancy
+    return keep
+
+@app.get("/nearby")
+async def nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100),
+    max_occupancy: Optional[float] = None,
+    kind: Optional[str] = Query(None, pattern="^(location|event)$"),
+):
+    """
+    The `k` closest campus locations and events to a point, optionally only those at or below `max_occupancy` percent.
+    """
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return []
+    matches = snapshot.indexes["spatial"].nearest(lat, lng, k, occupancy_filter(max_occupancy, kind))
+    return [{**point, "distance_m": round(dist, 1)} for dist, point in matches]
+
+@app.get("/within")
+async def within_bounds(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    max_occupancy: Optional[float] = None,
+    kind: Optional[str] = Query(None, pattern="^(location|event)$"),
+):
+    """
+    Campus locations and events inside the visible map bounds.
+    """
+    if south > north or west > east:
+        raise HTTPException(status_code=400, detail="Expected south <= north and west <= east")
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return []
+    return snapshot.indexes["spatial"].within(south, west, north, east, occupancy_filter(max_occupancy, kind))
 
 class EventRequest(BaseModel):
     text: str
@@ -502,8 +1209,86 @@ def generate_google_calendar_link(event: dict) -> str:
     #webbrowser.open(link)  # Opens the link automatically on the server
     return link
 
+@app.get("/events.ics")
+async def events_calendar(
+    request: Request,
+    location: Optional[str] = None,
+    q: Optional[str] = None,
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+):
+    """
+    Upcoming events as a subscribable iCalendar feed, streamed as it is generated.
+    Narrow it with `location` (case-insensitive substring), `q` (keyword search,
+    best matches first), and `from`/`to` (unix seconds). Send If-None-Match to
+    get a 304 while the selected events are unchanged.
+    """
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="No snapshot loaded yet")
+
+    index = snapshot.indexes["events"]
+    if q:
+        events = [event for event, _ in snapshot.indexes["search"].search(q, limit=len(index) or 1)]
+        if start is not None or end is not None:
+            events = [
+                e for e in events
+                if (start is None or e.ts_start >= start) and (end is None or e.ts_start < end)
+            ]
+    else:
+        events = index.between(start, end)
+    if location:
+        needle = location.lower()
+        events = [e for e in events if needle in e.location.lower()]
+
+    etag = calendar_etag(events, location, q, start, end)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300, must-revalidate"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    name = "TAMU Events" + (f" at {location}" if location else "") + (f": {q}" if q else "")
+    headers["Content-Disposition"] = 'inline; filename="events.ics"'
+    return StreamingResponse(
+        stream_calendar(events, name, snapshot.created_at),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
+
+class CalendarLinksRequest(BaseModel):
+    ids: List[str]
+
+@app.post("/events/calendar-links")
+async def calendar_links(request: CalendarLinksRequest):
+    """
+    Google Calendar links for many event ids at once (up to CALENDAR_LINKS_MAX_IDS).
+    Links come back in request order; ids that are unknown or have no start time are listed in "missing".
+    """
+    if len(request.ids) > CALENDAR_LINKS_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {CALENDAR_LINKS_MAX_IDS} ids per request")
+    snapshot = tracker.snapshots.current
+    by_key = snapshot.indexes["events"].by_key if snapshot else {}
+
+    links, missing = [], []
+    for event_id in request.ids:
+        event = by_key.get(event_id)
+        times = event.calendar_times() if event else None
+        if times is None:
+            missing.append(event_id)
+            continue
+        links.append({
+            "id": event_id,
+            "link": generate_google_calendar_link({
+                "text": event.title,
+                "start": times[0],
+                "end": times[1],
+                "details": event.summary,
+                "location": event.location,
+            }),
+        })
+    return {"version": snapshot.version if snapshot else None, "links": links, "missing": missing}
+
 @app.post("/create-event")
-def create_event(event: EventRequest):
+async def create_event(event: EventRequest):
     """
     Endpoint to generate a Google Calendar link and open it automatically.
     """
@@ -511,37 +1296,15 @@ def create_event(event: EventRequest):
     link = generate_google_calendar_link(event_dict)
     return {"message": "Google Calendar link opened on the server!", "link": link}
 
-import pytz
-import json
 import re
 
 @app.get("/get-event-requests", response_model=List[EventRequest])
-def get_event_requests():
+async def get_event_requests(request: Request):
     """
     Endpoint to return a list of events formatted as EventRequest dictionaries.
+    Served from bytes built once per snapshot (JSON, or MessagePack via Accept).
     """
-    raw_events = tracker.fetch_event_data(limit=10)  # Adjust limit as needed
-    formatted_events = []
-
-    for event in raw_events:
-        try:
-            # Convert readable time back to datetime object
-            start_dt = datetime.strptime(event["start_time"], "%Y-%m-%d %I:%M %p")
-            end_dt = datetime.strptime(event["end_time"], "%Y-%m-%d %I:%M %p")
-
-            # Format to RFC5545-compliant Google Calendar format: YYYYMMDDTHHMMSS±HHMM
-            tz = pytz.timezone("America/Chicago")  # Adjust to your local timezone
-            start_str = start_dt.astimezone(tz).strftime("%Y%m%dT%H%M%S%z")
-            end_str = end_dt.astimezone(tz).strftime("%Y%m%dT%H%M%S%z")
-
-            formatted_events.append(EventRequest(
-                text=event["title"],
-                start=start_str,
-                end=end_str,
-                details=event["summary"],
-                location=event["location"]
-            ))
-        except Exception as e:
-            print(f"⚠️ Failed to format event: {e}")
-
-    return formatted_events
+    snapshot = tracker.snapshots.current
+    if snapshot is None:
+        return []
+    return cached_response(request, snapshot.bodies["event_requests"], RETRIEVE_MAX_AGE_SECONDS)
@@ -0,0 +1,189 @@
+"""Compact typed records for rec facilities, libraries, and events."""
+
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from zoneinfo import ZoneInfo
+
+from spatial import coerce_coordinates
+
+CAMPUS_TZ = ZoneInfo("America/Chicago")
+CALENDAR_URL = "https://calendar.tamu.edu/live/"
+
+R = TypeVar("R", "Facility", "Library", "Event")
+# {"rec": [Facility], "libraries": [Library], "events": [Event]}
+FeedData = Dict[str, List[Any]]
+
+
+def percent(occupied: int, capacity: int) -> float:
+    return round((occupied / capacity) * 100, 1) if capacity else 0.0
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass(slots=True)
+class Facility:
+    """One rec facility reading. ``to_dict`` restores the upstream field names."""
+
+    name: str
+    count: int
+    capacity: int
+    is_closed: bool
+    updated: str
+
+    @classmethod
+    def from_upstream(cls, raw: Dict) -> "Facility":
+        return cls(
+            name=raw.get("LocationName", "Unknown"),
+            count=_int(raw.get("LastCount")),
+            capacity=_int(raw.get("TotalCapacity")),
+            is_closed=bool(raw.get("IsClosed", False)),
+            updated=raw.get("LastUpdatedDateAndTime", "") or "",
+        )
+
+    @property
+    def percent_full(self) -> float:
+        return percent(self.count, self.capacity)
+
+    def to_dict(self) -> Dict:
+        return {
+            "LocationName": self.name,
+            "LastCount": self.count,
+            "TotalCapacity": self.capacity,
+            "IsClosed": self.is_closed,
+            "LastUpdatedDateAndTime": self.updated,
+        }
+
+
+@dataclass(slots=True)
+class Library:
+    """One library reading; ``reported_percent`` is the feed's own ``percentfull``."""
+
+    name: str
+    capacity: int
+    remaining: int
+    reported_percent: float
+
+    @classmethod
+    def from_upstream(cls, raw: Dict) -> "Library":
+        return cls(
+            name=raw.get("name", "Unknown"),
+            capacity=_int(raw.get("max")),
+            remaining=_int(raw.get("remaining")),
+            reported_percent=raw.get("percentfull", 0) or 0,
+        )
+
+    @property
+    def occupied(self) -> int:
+        return self.capacity - self.remaining
+
+    @property
+    def percent_full(self) -> float:
+        return percent(self.occupied, self.capacity)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "max": self.capacity,
+            "remaining": self.remaining,
+            "percentfull": self.reported_percent,
+        }
+
+
+@dataclass(slots=True)
+class Event:
+    """
+    One calendar event with numeric unix timestamps. The display strings
+    (``start_time``/``end_time``) are derived on demand instead of stored.
+    """
+
+    id: Optional[str]
+    title: str
+    location: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    ts_start: Optional[float]
+    ts_end: Optional[float]
+    href: str
+    summary: str
+
+    @classmethod
+    def from_upstream(cls, raw: Dict) -> "Event":
+        coords = coerce_coordinates(raw.get("latitude"), raw.get("longitude"))
+        return cls(
+            id=None if raw.get("id") is None else str(raw["id"]),
+            title=raw.get("title", "Untitled Event"),
+            location=raw.get("location", "Unknown"),
+            latitude=coords[0] if coords else None,
+            longitude=coords[1] if coords else None,
+            ts_start=raw.get("ts_start"),
+            ts_end=raw.get("ts_end"),
+            href=raw.get("href", ""),
+            summary=(raw.get("summary") or "").strip(),
+        )
+
+    @property
+    def link(self) -> str:
+        return CALENDAR_URL + self.href
+
+    @property
+    def key(self) -> str:
+        """Stable identity: the calendar id, or the link for events without one."""
+        return str(self.id or self.link)
+
+    @staticmethod
+    def _display(ts: Optional[float]) -> str:
+        return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %I:%M %p") if ts else "N/A"
+
+    @property
+    def start_time(self) -> str:
+        return self._display(self.ts_start)
+
+    @property
+    def end_time(self) -> str:
+        return self._display(self.ts_end)
+
+    def calendar_times(self) -> Optional[tuple]:
+        """(start, end) as Google Calendar ``YYYYMMDDTHHMMSS±HHMM`` in campus time, or None if untimed."""
+        if not self.ts_start or not self.ts_end:
+            return None
+        return tuple(
+            datetime.fromtimestamp(ts, CAMPUS_TZ).strftime("%Y%m%dT%H%M%S%z")
+            for ts in (self.ts_start, self.ts_end)
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "location": self.location,
+            "latitude": self.latitude if self.latitude is not None else "N/A",
+            "longitude": self.longitude if self.longitude is not None else "N/A",
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "ts_start": self.ts_start,
+            "ts_end": self.ts_end,
+            "link": self.link,
+            "summary": self.summary,
+        }
+
+
+RECORD_TYPES: Dict[str, Type] = {"rec": Facility, "libraries": Library, "events": Event}
+
+
+def to_dicts(records: List[Any]) -> List[Dict]:
+    return [record.to_dict() for record in records]
+
+
+def to_rows(records: List[Any]) -> List[tuple]:
+    """Positional field tuples, the most compact form for shipping records between processes."""
+    return [astuple(record) for record in records]
+
+
+def from_rows(cls: Type[R], rows: List[list]) -> List[R]:
+    return [cls(*row) for row in rows]
@@ -0,0 +1,152 @@
+"""Pre-serialized, conditionally served response bodies."""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+from fastapi import Request, Response
+
+# Faster encoders and extra codings are optional; without them bodies fall back to
+# the standard library and clients simply get gzip JSON.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# bytes, or a memoryview into a shared snapshot file (see shared.py)
+Buffer = Union[bytes, memoryview]
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """
+    One payload serialized once, with its gzip (and brotli) variants and a strong ETag.
+    ``msgpack`` holds the same payload as MessagePack, when msgpack is installed.
+    ``etag`` is the identity body's tag; ``coded_etag`` derives each compressed variant's.
+    """
+
+    body: Buffer
+    gzip_body: Buffer
+    etag: str
+    media_type: str = "application/json"
+    br_body: Optional[Buffer] = None
+    msgpack: Optional["CachedBody"] = None
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CachedBody":
+        packed = None
+        if msgpack is not None:
+            packed = cls.from_bytes(msgpack.packb(payload, use_bin_type=True, default=str), MSGPACK_MEDIA_TYPE)
+        return cls.from_bytes(dumps(payload), msgpack=packed)
+
+    @classmethod
+    def from_bytes(cls, body: bytes, media_type: str = "application/json", **extra) -> "CachedBody":
+        # The tag hashes the bytes, so an unchanged payload keeps its ETag across snapshots.
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        return cls(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6, mtime=0),
+            etag=etag,
+            media_type=media_type,
+            br_body=brotli.compress(body, quality=5) if brotli is not None else None,
+            **extra,
+        )
+
+    def coded_etag(self, coding: Optional[str]) -> str:
+        """Strong validators must differ between content-codings (RFC 9110), so suffix the coding."""
+        return self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+
+    def to_sections(self, name: str) -> Tuple[Dict, Dict[str, bytes]]:
+        """Flatten into (metadata, {section name: bytes}) for a shared snapshot file."""
+        meta = {"etag": self.etag, "media_type": self.media_type, "br": self.br_body is not None}
+        sections = {f"{name}.body": bytes(self.body), f"{name}.gzip": bytes(self.gzip_body)}
+        if self.br_body is not None:
+            sections[f"{name}.br"] = bytes(self.br_body)
+        if self.msgpack is not None:
+            meta["msgpack"], packed = self.msgpack.to_sections(f"{name}.mp")
+            sections.update(packed)
+        return meta, sections
+
+    @classmethod
+    def from_sections(cls, name: str, meta: Dict, sections: Dict[str, Buffer]) -> "CachedBody":
+        """Inverse of ``to_sections``; the buffers are used as-is, without copying."""
+        return cls(
+            body=sections[f"{name}.body"],
+            gzip_body=sections[f"{name}.gzip"],
+            etag=meta["etag"],
+            media_type=meta["media_type"],
+            br_body=sections[f"{name}.br"] if meta.get("br") else None,
+            msgpack=cls.from_sections(f"{name}.mp", meta["msgpack"], sections) if "msgpack" in meta else None,
+        )
+
+
+class BufferResponse(Response):
+    """A response whose body may be any bytes-like buffer, sent without copying it."""
+
+    def render(self, content: Any) -> Buffer:
+        return b"" if content is None else content
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against ``etag``."""
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def accepts(header: str, token: str) -> bool:
+    """True if a comma-separated Accept/Accept-Encoding header lists ``token`` without q=0."""
+    for part in header.lower().split(","):
+        value, _, params = part.strip().partition(";")
+        if value.strip() == token:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def cached_response(request: Request, cached: CachedBody, max_age: int) -> Response:
+    """
+    Serve ``cached`` as a 304, brotli, gzip, or identity response depending on the
+    request headers, as MessagePack when the client accepts it and it is available.
+    """
+    if cached.msgpack is not None and accepts(request.headers.get("accept", ""), MSGPACK_MEDIA_TYPE):
+        cached = cached.msgpack
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if cached.br_body is not None and accepts(accept_encoding, "br"):
+        coding, body = "br", cached.br_body
+    elif accepts(accept_encoding, "gzip"):
+        coding, body = "gzip", cached.gzip_body
+    else:
+        coding, body = None, cached.body
+
+    etag = cached.coded_etag(coding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+    return BufferResponse(body, media_type=cached.media_type, headers=headers)
@@ -0,0 +1,151 @@
+"""Inverted index for keyword search over calendar events."""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from records import Event
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TAG_RE = re.compile(r"<[^>]+>")
+
+# Matches in the title matter more than matches buried in the summary.
+FIELD_WEIGHTS = {"title": 3.0, "location": 2.0, "summary": 1.0}
+PREFIX_PENALTY = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens, with any HTML tags stripped."""
+    return TOKEN_RE.findall(TAG_RE.sub(" ", text or "").lower())
+
+
+def doc_id(event: Event) -> str:
+    return event.key
+
+
+class EventSearchIndex:
+    """
+    Term -> {doc: weighted term frequency} postings over title, location, and summary.
+
+    ``updated`` returns a new index for the next event feed, so each snapshot keeps
+    its own immutable index. It works incrementally: only events that are new or
+    whose text changed are (re)tokenized, events that left the feed are dropped,
+    and every posting list it does not touch is shared with the previous index.
+    Every query term matches exactly or as a prefix of an indexed term (prefix
+    hits score lower), all terms must match, and results are ranked by
+    idf-weighted field scores.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._doc_text: Dict[str, Tuple[str, str, str]] = {}
+        self._events: Dict[str, Event] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        # Terms whose posting dict belongs to this index; the rest are shared and copied before writing.
+        self._owned: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def updated(self, events: List[Event]) -> "EventSearchIndex":
+        """A new index over ``events``; this one is left untouched for readers of older snapshots."""
+        index = EventSearchIndex()
+        index._postings = defaultdict(dict, self._postings)
+        index._doc_terms = dict(self._doc_terms)
+        index._doc_text = dict(self._doc_text)
+        index._events = dict(self._events)
+        index._vocabulary = self._vocabulary
+        index._vocabulary_dirty = self._vocabulary_dirty
+        index._sync(events)
+        return index
+
+    def _sync(self, events: List[Event]):
+        seen = set()
+        for event in events:
+            key = doc_id(event)
+            seen.add(key)
+            text = (event.title, event.location, event.summary)
+            self._events[key] = event
+            if self._doc_text.get(key) != text:
+                self._remove(key)
+                self._add(key, text)
+        for key in [k for k in self._events if k not in seen]:
+            self._remove(key)
+            del self._events[key]
+
+    def _add(self, key: str, text: Tuple[str, str, str]):
+        weights: Dict[str, float] = defaultdict(float)
+        for field_name, value in zip(("title", "location", "summary"), text):
+            for token in tokenize(value):
+                weights[token] += FIELD_WEIGHTS[field_name]
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._vocabulary_dirty = True
+            self._owned_postings(token)[key] = weight
+        self._doc_terms[key] = set(weights)
+        self._doc_text[key] = text
+
+    def _remove(self, key: str):
+        for token in self._doc_terms.pop(key, ()):
+            postings = self._owned_postings(token)
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+        self._doc_text.pop(key, None)
+
+    def _owned_postings(self, token: str) -> Dict[str, float]:
+        """The posting dict for ``token``, copied first if it is still shared with another index."""
+        if token not in self._owned:
+            self._postings[token] = dict(self._postings.get(token, ()))
+            self._owned.add(token)
+        return self._postings[token]
+
+    def _expand(self, token: str) -> List[str]:
+        """Indexed terms that start with ``token`` (including an exact match)."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        matches = []
+        for i in range(bisect_left(self._vocabulary, token), len(self._vocabulary)):
+            term = self._vocabulary[i]
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[Event, float]]:
+        """Return up to ``limit`` (event, score) pairs matching every query term, best first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        total = len(self._events) or 1
+        # Score the rarest term first so later terms only probe the surviving candidates.
+        expanded = sorted(
+            ((token, self._expand(token)) for token in tokens),
+            key=lambda item: sum(len(self._postings[term]) for term in item[1]),
+        )
+        scores: Dict[str, float] = {}
+        for i, (token, terms) in enumerate(expanded):
+            token_scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings[term]
+                factor = math.log(1 + total / len(postings)) * (1.0 if term == token else PREFIX_PENALTY)
+                # After the first term, only documents still in the running are probed.
+                candidates = postings.keys() if i == 0 else scores.keys()
+                for key in candidates:
+                    weight = postings.get(key)
+                    if weight is not None and weight * factor > token_scores.get(key, 0.0):
+                        token_scores[key] = weight * factor
+            scores = token_scores if i == 0 else {k: scores[k] + v for k, v in token_scores.items()}
+            if not scores:
+                return []
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self._events[key], round(score, 3)) for key, score in best]
@@ -0,0 +1,133 @@
+"""Share one poller's snapshot with every uvicorn worker through a memory-mapped file."""
+
+import fcntl
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+MAGIC = b"AGGIEMAP"
+# magic, version, created_at, section count
+HEADER = struct.Struct("<8sQdI")
+# section name, offset, length
+SECTION = struct.Struct("<32sQQ")
+
+
+@dataclass(frozen=True)
+class SharedView:
+    """One published snapshot file, mapped read-only; ``sections`` are views into the map."""
+
+    version: int
+    created_at: float
+    sections: Dict[str, memoryview]
+
+
+class PollerLease:
+    """
+    Non-blocking ``flock`` on ``path``: whichever worker holds it polls the upstreams.
+    The kernel drops the lock when its holder exits, so another worker takes over
+    on its next ``acquire``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Return True if this process holds (or just took) the lease."""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedSnapshotFile:
+    """
+    ``snapshot.bin`` in ``directory`` (put it on /dev/shm to keep it in shared memory).
+
+    The writer lays out a fixed header, a section table, then each section's
+    bytes, and swaps the file in with ``os.replace`` so readers never see a
+    partial write. Readers ``mmap`` the current file and hand out memoryviews,
+    so every worker serves the same physical pages instead of its own copy.
+    A replaced file stays mapped until the last view into it is dropped.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "snapshot.bin")
+        self.lease = PollerLease(os.path.join(directory, "poller.lock"))
+        self._stamp: Optional[tuple] = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Newest version this process has written or seen in the file."""
+        return self._version
+
+    def write(self, version: int, created_at: float, sections: Dict[str, bytes]):
+        """Atomically publish ``sections`` as ``version``."""
+        offset = HEADER.size + SECTION.size * len(sections)
+        table, blobs = bytearray(), []
+        for name, blob in sections.items():
+            table += SECTION.pack(name.encode(), offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version, created_at, len(sections)))
+            f.write(table)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, self.path)
+        self._stamp, self._version = None, version
+
+    def read_newer(self, version: int) -> Optional[SharedView]:
+        """Map the current file if it holds a snapshot newer than ``version``, else None."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp and self._version <= version:
+            return None  # same file as last time, already seen
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_version, created_at, count = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            mm.close()
+            raise ValueError(f"{self.path} is not a shared snapshot file")
+        self._stamp, self._version = stamp, file_version
+        if file_version <= version:
+            mm.close()
+            return None
+
+        view = memoryview(mm)
+        sections = {}
+        for i in range(count):
+            name, start, length = SECTION.unpack_from(mm, HEADER.size + i * SECTION.size)
+            sections[name.rstrip(b"\0").decode()] = view[start:start + length]
+        return SharedView(version=file_version, created_at=created_at, sections=sections)
+
+    def close(self):
+        self.lease.release()
@@ -0,0 +1,165 @@
+"""Versioned in-memory snapshots of the live TAMU feeds."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One consistent view of rec, library, and event data."""
+
+    version: int
+    created_at: float
+    data: Dict[str, List[Dict]]
+    locations: List[Dict]
+    indexes: Dict[str, Any] = field(default_factory=dict)
+    bodies: Dict[str, Any] = field(default_factory=dict)
+    # Wall-clock time this process published it; ``created_at`` is the time the data
+    # describes, which differs under replay or when adopted from another worker.
+    published_at: float = field(default_factory=time.time)
+
+
+class SnapshotStore:
+    """Hold the latest snapshot; readers grab it without waiting on upstreams."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: Optional[Snapshot] = None
+        self._listeners: List[Callable[[Optional[Snapshot], Snapshot], None]] = []
+
+    @property
+    def current(self) -> Optional[Snapshot]:
+        """Return the most recently published snapshot (None before the first load)."""
+        return self._current
+
+    def publish(
+        self,
+        data: Dict[str, List[Dict]],
+        locations: List[Dict],
+        indexes: Optional[Dict[str, Any]] = None,
+        bodies: Optional[Dict[str, Any]] = None,
+        version: Optional[int] = None,
+        created_at: Optional[float] = None,
+    ) -> Snapshot:
+        """
+        Swap in a new snapshot with the next version number, or with ``version``
+        and ``created_at`` when adopting one published by another process.
+        """
+        with self._lock:
+            if version is None:
+                version = self._current.version + 1 if self._current else 1
+            snapshot = Snapshot(
+                version=version,
+                created_at=created_at if created_at is not None else time.time(),
+                data=data,
+                locations=locations,
+                indexes=indexes or {},
+                bodies=bodies or {},
+            )
+            previous, self._current = self._current, snapshot
+
+        for listener in self._listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                print(f"⚠️ Snapshot listener failed: {e}")
+        return snapshot
+
+    def add_listener(self, listener: Callable[[Optional[Snapshot], Snapshot], None]):
+        """Call ``listener(previous, snapshot)`` after every publish."""
+        self._listeners.append(listener)
+
+
+def diff_locations(old: List[Dict], new: List[Dict]) -> Optional[Dict[str, List]]:
+    """
+    Compare two /retrieve payloads by entry ``id``.
+
+    Returns {"added": [...new entries...], "changed": [...entries that differ...],
+    "removed": [...ids no longer present...]}, or None when either payload repeats
+    an id, since such a delta could not be applied unambiguously.
+    """
+    before = {item["id"]: item for item in old}
+    after = {item["id"]: item for item in new}
+    if len(before) != len(old) or len(after) != len(new):
+        return None
+    return {
+        "added": [item for key, item in after.items() if key not in before],
+        "changed": [item for key, item in after.items() if key in before and before[key] != item],
+        "removed": [key for key in before if key not in after],
+    }
+
+
+class LocationChangelog:
+    """
+    The last ``maxlen`` per-publish location diffs, so a client that is a few
+    versions behind can fetch only what changed. Entries are keyed by entry ``id``
+    like ``diff_locations``. Register ``on_publish`` as a SnapshotStore listener.
+    """
+
+    def __init__(self, maxlen: int = 120):
+        # (from_version, to_version, {"added": [...], "changed": [...], "removed": [...]})
+        self._entries: Deque[Tuple[int, int, Dict]] = deque(maxlen=maxlen)
+
+    def on_publish(self, previous: Optional[Snapshot], snapshot: Snapshot):
+        if previous is None:
+            return
+        if self._entries and self._entries[-1][1] != previous.version:
+            self._entries.clear()  # a gap (e.g. adopted from another worker); start a new chain
+        diff = diff_locations(previous.locations, snapshot.locations)
+        if diff is None:
+            self._entries.clear()  # no usable delta; clients behind this point get the full list
+            return
+        self._entries.append((previous.version, snapshot.version, diff))
+
+    def since(self, version: int, current: int) -> Optional[Dict[str, List]]:
+        """
+        Net {"added", "changed", "removed"} between ``version`` and ``current``,
+        or None when ``version`` is older than the log (or not one we published).
+        """
+        if version == current:
+            return {"added": [], "changed": [], "removed": []}
+        entries = list(self._entries)
+        start = next((i for i, entry in enumerate(entries) if entry[0] == version), None)
+        if start is None or entries[-1][1] != current:
+            return None
+
+        existed: Dict[str, bool] = {}  # did the id exist at ``version``?
+        final: Dict[str, Optional[Dict]] = {}  # latest entry, or None once removed
+        for _, _, diff in entries[start:]:
+            for item in diff["added"]:
+                existed.setdefault(item["id"], False)
+                final[item["id"]] = item
+            for item in diff["changed"]:
+                existed.setdefault(item["id"], True)
+                final[item["id"]] = item
+            for key in diff["removed"]:
+                existed.setdefault(key, True)
+                final[key] = None
+
+        result: Dict[str, List] = {"added": [], "changed": [], "removed": []}
+        for key, item in final.items():
+            if item is None:
+                if existed[key]:
+                    result["removed"].append(key)
+            else:
+                result["changed" if existed[key] else "added"].append(item)
+        return result
+
+
+async def refresh_forever(refresh: Callable[[], Awaitable[object]], interval: float, immediate: bool = False):
+    """
+    Call ``refresh`` every ``interval`` seconds until the task is cancelled.
+    With ``immediate`` the first call happens right away instead of after one interval.
+    """
+    delay = 0 if immediate else interval
+    while True:
+        await asyncio.sleep(delay)
+        delay = interval
+        try:
+            await refresh()
+        except Exception as e:
+            print(f"❌ Snapshot refresh failed: {e}")
@@ -0,0 +1,332 @@
+"""
+Where upstream feed responses come from: live HTTP, a recorder wrapped around
+another source, or a replay of earlier recordings.
+
+Recordings are one file per changed response, ``<dir>/<feed>/<UTC time>.json``
+holding the upstream bytes as received. From ``backend/``:
+
+    python -m sources record --dir data/recordings --interval 30
+    python -m sources backfill --dir data/recordings --from 2025-10-13T19:00:00Z --step 30
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+import requests
+
+from feeds import FeedState
+
+UPSTREAM_TIMEOUT_SECONDS = 10
+STAMP_FORMAT = "%Y%m%dT%H%M%S.%fZ"
+
+
+def feed_urls() -> Dict[str, str]:
+    """
+    Upstream URL per feed, read when called so a ``.env`` loaded after import still
+    applies. ``or`` rather than a getenv default, so an empty ``REC_API_URL=`` means the default.
+    """
+    return {
+        "libraries": os.getenv("LIBRARY_API_URL") or "https://php.library.tamu.edu/utilities/occupancy/index.php",
+        "rec": os.getenv("REC_API_URL") or (
+            "https://goboardapi.azurewebsites.net/api/FacilityCount/"
+            "GetCountsByAccount?AccountAPIKey=99563b55-ae4f-4001-b384-648e0ebeaeb5"
+        ),
+        "events": os.getenv("EVENTS_API_URL") or (
+            "https://calendar.tamu.edu/live/json/events?user_tz=America/Chicago&group=* Main University Calendar"
+        ),
+    }
+
+
+@dataclass(frozen=True)
+class FeedResponse:
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+
+
+NOT_MODIFIED = FeedResponse(304, {}, b"")
+
+
+def file_stamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(STAMP_FORMAT)
+
+
+def parse_stamp(stamp: str) -> float:
+    return datetime.strptime(stamp, STAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Unix seconds, or an ISO 8601 time (UTC when it has no offset)."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+class FeedSource(ABC):
+    """
+    Produces feed responses for the tracker. ``clock`` is the time the data
+    describes: now for live sources, the recorded time for a replay.
+    """
+
+    def clock(self) -> float:
+        return time.time()
+
+    @abstractmethod
+    def fetch(self, feed: FeedState) -> FeedResponse:
+        """One response for ``feed``: 200 with the body, or 304 when nothing changed."""
+
+    async def afetch(self, feed: FeedState) -> FeedResponse:
+        return self.fetch(feed)
+
+    async def aclose(self):
+        pass
+
+
+class HttpSource(FeedSource):
+    """Live upstream APIs, with conditional requests over pooled connections."""
+
+    def __init__(self):
+        self._session = requests.Session()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def fetch(self, feed: FeedState) -> FeedResponse:
+        response = self._session.get(feed.url, headers=feed.conditional_headers(), timeout=UPSTREAM_TIMEOUT_SECONDS)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return FeedResponse(response.status_code, response.headers, response.content)
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first async use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=UPSTREAM_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                follow_redirects=True,
+            )
+        return self._http
+
+    async def afetch(self, feed: FeedState) -> FeedResponse:
+        response = await self._get_http_client().get(feed.url, headers=feed.conditional_headers())
+        if response.status_code != 304:
+            response.raise_for_status()
+        return FeedResponse(response.status_code, response.headers, response.content)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class RecordingSource(FeedSource):
+    """Pass responses through from ``inner``, saving each one whose bytes changed under ``directory``."""
+
+    def __init__(self, inner: FeedSource, directory: str):
+        self.inner = inner
+        self.directory = directory
+        self._hashes: Dict[str, str] = {}
+
+    def clock(self) -> float:
+        return self.inner.clock()
+
+    def _save(self, name: str, ts: float, response: FeedResponse):
+        if response.status_code != 200:
+            return
+        digest = hashlib.sha1(response.content).hexdigest()
+        if digest == self._hashes.get(name):
+            return
+        feed_dir = os.path.join(self.directory, name)
+        os.makedirs(feed_dir, exist_ok=True)
+        path = os.path.join(feed_dir, file_stamp(ts) + ".json")
+        with open(path + ".tmp", "wb") as f:
+            f.write(response.content)
+        os.replace(path + ".tmp", path)
+        self._hashes[name] = digest
+
+    def fetch(self, feed: FeedState) -> FeedResponse:
+        ts = self.clock()
+        response = self.inner.fetch(feed)
+        self._save(feed.name, ts, response)
+        return response
+
+    async def afetch(self, feed: FeedState) -> FeedResponse:
+        ts = self.clock()
+        response = await self.inner.afetch(feed)
+        await asyncio.to_thread(self._save, feed.name, ts, response)
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class ReplaySource(FeedSource):
+    """
+    Play recordings back on a clock that starts at ``start`` (default: the first
+    recording) and runs ``speed`` times faster than real time. With ``speed=0``
+    the clock only moves through ``seek``, for stepping through a recording offline.
+    Each feed serves its latest recording at or before the clock, and a 304 until
+    a newer one is due.
+    """
+
+    def __init__(self, directory: str, speed: float = 1.0, start: Optional[float] = None):
+        self.directory = directory
+        self.speed = speed
+        self._recordings: Dict[str, List[Tuple[float, str]]] = {}
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            feed_dir = os.path.join(directory, name)
+            if os.path.isdir(feed_dir):
+                self._recordings[name] = sorted(
+                    (parse_stamp(entry[:-5]), os.path.join(feed_dir, entry))
+                    for entry in os.listdir(feed_dir)
+                    if entry.endswith(".json")
+                )
+        self._times = {name: [ts for ts, _ in recordings] for name, recordings in self._recordings.items()}
+        stamps = [ts for times in self._times.values() for ts in times]
+        if not stamps:
+            raise ValueError(f"No recordings under {directory}")
+        self.start = start if start is not None else min(stamps)
+        self.end = max(stamps)
+        self._position = self.start
+        self._origin: Optional[float] = None
+        self._served: Dict[str, int] = {}
+        print(f"⏪ Replaying {len(stamps)} recordings from {directory} at {speed:g}x, starting {file_stamp(self.start)}")
+
+    @property
+    def finished(self) -> bool:
+        return self.clock() >= self.end
+
+    def clock(self) -> float:
+        if self.speed <= 0:
+            return self._position
+        # Starts on first use, so time spent booting the app does not skip recordings.
+        if self._origin is None:
+            self._origin = time.monotonic()
+        return min(self.start + (time.monotonic() - self._origin) * self.speed, self.end)
+
+    def seek(self, ts: float):
+        self._position = ts
+
+    def steps(self, step: float, end: Optional[float] = None) -> Iterator[float]:
+        """Seek from ``start`` to ``end`` (default: the last recording) in ``step``-second increments."""
+        ts, end = self.start, end if end is not None else self.end
+        while ts <= end:
+            self.seek(ts)
+            yield ts
+            ts += step
+
+    def fetch(self, feed: FeedState) -> FeedResponse:
+        recordings = self._recordings.get(feed.name, [])
+        index = bisect.bisect_right(self._times.get(feed.name, []), self.clock()) - 1
+        if index < 0 or index == self._served.get(feed.name):
+            return NOT_MODIFIED
+        self._served[feed.name] = index
+        with open(recordings[index][1], "rb") as f:
+            return FeedResponse(200, {}, f.read())
+
+
+def make_source() -> FeedSource:
+    """
+    The source selected by ``FEED_SOURCE``: ``live`` (default), ``record`` (live,
+    saved to ``FEED_RECORD_DIR``), or ``replay`` (from ``FEED_REPLAY_DIR`` at
+    ``FEED_REPLAY_SPEED``, starting at ``FEED_REPLAY_FROM``).
+    """
+    kind = os.getenv("FEED_SOURCE", "live")
+    default_dir = os.path.join(os.path.dirname(__file__), "data", "recordings")
+    if kind == "replay":
+        return ReplaySource(
+            os.getenv("FEED_REPLAY_DIR", default_dir),
+            speed=float(os.getenv("FEED_REPLAY_SPEED", "1")),
+            start=parse_time(os.getenv("FEED_REPLAY_FROM")),
+        )
+    if kind == "record":
+        return RecordingSource(HttpSource(), os.getenv("FEED_RECORD_DIR", default_dir))
+    if kind != "live":
+        raise ValueError(f"Unknown FEED_SOURCE {kind!r} (expected live, record, or replay)")
+    return HttpSource()
+
+
+# ===================== CLI ===================== #
+
+def record(directory: str, interval: float, duration: Optional[float]):
+    """Poll the live feeds every ``interval`` seconds, saving changed responses, without running the API."""
+    source = RecordingSource(HttpSource(), directory)
+    feeds = [FeedState(name, url, parser=lambda data: []) for name, url in feed_urls().items()]
+    deadline = time.time() + duration if duration else None
+    print(f"🔴 Recording feeds to {directory} every {interval:g}s")
+    while deadline is None or time.time() < deadline:
+        for feed in feeds:
+            try:
+                response = source.fetch(feed)
+                feed.update(response.status_code, response.headers, response.content)
+            except Exception as e:
+                print(f"❌ Error fetching data from {feed.url}: {e}")
+        time.sleep(interval)
+
+
+def backfill(directory: str, history_dir: Optional[str], step: float, start: Optional[float], end: Optional[float]) -> int:
+    """Replay a recording through the full refresh pipeline, appending its samples to the occupancy history."""
+    os.environ.update({"FEED_SOURCE": "replay", "FEED_REPLAY_DIR": directory, "FEED_REPLAY_SPEED": "0"})
+    if start is not None:
+        os.environ["FEED_REPLAY_FROM"] = str(start)
+    if history_dir:
+        os.environ["HISTORY_DIR"] = history_dir
+    from main import tracker  # configured from the environment set above
+
+    # The history file must stay in time order for its binary search; refuse to interleave.
+    last = tracker.history.last_timestamp
+    if last is not None and last >= tracker.source.start:
+        print(
+            f"❌ {tracker.history.directory} already has samples up to {file_stamp(last)}, after the "
+            f"replay start {file_stamp(tracker.source.start)}; backfill into an empty --history-dir"
+        )
+        return 1
+    started, refreshes = time.perf_counter(), 0
+    for _ in tracker.source.steps(step, end):
+        tracker.load_all_data()
+        refreshes += 1
+    elapsed = time.perf_counter() - started
+    print(f"✅ Backfilled {refreshes} refreshes in {elapsed:.1f}s ({refreshes / elapsed if elapsed else 0:.0f}/s)")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record live feeds, or backfill history from a recording.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record")
+    rec.add_argument("--dir", default=os.path.join("data", "recordings"))
+    rec.add_argument("--interval", type=float, default=30)
+    rec.add_argument("--duration", type=float, help="seconds to record (default: until interrupted)")
+    fill = commands.add_parser("backfill")
+    fill.add_argument("--dir", default=os.path.join("data", "recordings"))
+    fill.add_argument("--history-dir", help="defaults to HISTORY_DIR")
+    fill.add_argument("--step", type=float, default=30, help="recorded seconds between refreshes")
+    fill.add_argument("--from", dest="start", help="unix seconds or ISO 8601 (default: first recording)")
+    fill.add_argument("--to", dest="end", help="unix seconds or ISO 8601 (default: last recording)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        try:
+            record(args.dir, args.interval, args.duration)
+        except KeyboardInterrupt:
+            pass
+    else:
+        return backfill(args.dir, args.history_dir, args.step, parse_time(args.start), parse_time(args.end))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
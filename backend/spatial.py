@@ -0,0 +1,122 @@
+"""Uniform-grid spatial index for nearest-neighbour and bounding-box lookups."""
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_METERS = 6_371_000
+DEFAULT_CELL_DEGREES = 0.005  # roughly 550 m north-south on campus
+
+Predicate = Optional[Callable[[Dict], bool]]
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance, matching ``haversineMeters`` in the frontend."""
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    h = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.atan2(math.sqrt(h), math.sqrt(1 - h))
+
+
+def coerce_coordinates(lat, lng) -> Optional[Tuple[float, float]]:
+    """Return (lat, lng) as floats, or None for missing/"N/A"/out-of-range values."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or (lat == 0 and lng == 0):
+        return None
+    return lat, lng
+
+
+class GridIndex:
+    """
+    Bucket points (dicts with ``lat``/``lng``) into fixed-size lat/lng cells.
+
+    ``within`` only visits the cells overlapping the box. ``nearest`` searches
+    rings of cells outward from the query point and stops once the k-th best
+    distance is closer than anything an unvisited ring could contain. It never
+    visits more cells than are populated, however far the query point is.
+    """
+
+    def __init__(self, points: Iterable[Dict], cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[int, int], List[Dict]] = defaultdict(list)
+        for point in points:
+            self._cells[self._cell(point["lat"], point["lng"])].append(point)
+        self._size = sum(len(bucket) for bucket in self._cells.values())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def within(self, south: float, west: float, north: float, east: float, predicate: Predicate = None) -> List[Dict]:
+        """Points inside the box, optionally filtered by ``predicate``."""
+        (row_lo, col_lo), (row_hi, col_hi) = self._cell(south, west), self._cell(north, east)
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            # Box is larger than the populated area: scanning the cells directly is cheaper.
+            cells = [bucket for (row, col), bucket in self._cells.items()
+                     if row_lo <= row <= row_hi and col_lo <= col <= col_hi]
+        else:
+            cells = [self._cells[(row, col)]
+                     for row in range(row_lo, row_hi + 1)
+                     for col in range(col_lo, col_hi + 1)
+                     if (row, col) in self._cells]
+        return [
+            p for bucket in cells for p in bucket
+            if south <= p["lat"] <= north and west <= p["lng"] <= east
+            and (predicate is None or predicate(p))
+        ]
+
+    def nearest(self, lat: float, lng: float, k: int = 10, predicate: Predicate = None) -> List[Tuple[float, Dict]]:
+        """The ``k`` closest points as (distance in meters, point), closest first."""
+        if not self._cells or k <= 0:
+            return []
+        center_row, center_col = self._cell(lat, lng)
+        # Smallest real-world width of one cell ring, used as a lower bound on unvisited points.
+        ring_meters = haversine_meters(lat, lng, lat + self.cell_degrees, lng)
+        ring_meters = min(ring_meters, haversine_meters(lat, lng, lat, lng + self.cell_degrees))
+        max_ring = max(
+            max(abs(row - center_row), abs(col - center_col)) for row, col in self._cells
+        )
+
+        if (2 * max_ring + 1) ** 2 > len(self._cells):
+            # Walking every ring out to the data would visit more empty cells than there are
+            # populated ones (a far-away query point): visit the populated cells by ring instead.
+            cells = sorted(
+                ((max(abs(row - center_row), abs(col - center_col)), bucket)
+                 for (row, col), bucket in self._cells.items()),
+                key=lambda item: item[0],
+            )
+        else:
+            cells = (
+                (ring, self._cells[(row, col)])
+                for ring in range(max_ring + 1)
+                for row in range(center_row - ring, center_row + ring + 1)
+                for col in range(
+                    center_col - ring, center_col + ring + 1,
+                    1 if abs(row - center_row) == ring else max(2 * ring, 1),
+                )
+                if (row, col) in self._cells
+            )
+
+        best: List[Tuple[float, int, Dict]] = []  # max-heap via negated distance
+        for ring, bucket in cells:
+            if len(best) == k and -best[0][0] <= (ring - 1) * ring_meters:
+                break
+            for point in bucket:
+                if predicate is not None and not predicate(point):
+                    continue
+                dist = haversine_meters(lat, lng, point["lat"], point["lng"])
+                entry = (-dist, id(point), point)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, entry)
+        return [(-d, p) for d, _, p in sorted(best, reverse=True)]
@@ -0,0 +1,84 @@
+"""Server-sent event fan-out of snapshot changes to connected clients."""
+
+import asyncio
+import json
+from typing import AsyncIterator, Optional, Set
+
+from snapshot import Snapshot, diff_locations
+
+HEARTBEAT_SECONDS = 15
+
+
+def sse_frame(event: str, payload: object, event_id: Optional[int] = None) -> bytes:
+    """Encode one server-sent event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class OccupancyBroadcaster:
+    """
+    Push occupancy changes to every subscriber.
+
+    Each publish is diffed and serialized exactly once; the resulting bytes are
+    handed to every subscriber queue as-is, so fan-out cost does not grow with
+    payload size. A subscriber that falls too far behind is disconnected so its
+    EventSource reconnects and starts again from a full snapshot.
+    """
+
+    def __init__(self, max_pending: int = 16):
+        self.max_pending = max_pending
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._snapshot_frame: Optional[bytes] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def on_publish(self, previous: Optional[Snapshot], snapshot: Snapshot):
+        """SnapshotStore listener: cache the full frame and broadcast the delta."""
+        self._snapshot_frame = sse_frame("snapshot", snapshot.locations, snapshot.version)
+        if previous is None or not self._subscribers:
+            return
+
+        delta = diff_locations(previous.locations, snapshot.locations)
+        if delta is None:
+            frame = self._snapshot_frame  # ambiguous ids; clients replace their list instead
+        elif not delta["added"] and not delta["changed"] and not delta["removed"]:
+            return
+        else:
+            frame = sse_frame("delta", {"changed": delta["added"] + delta["changed"], "removed": delta["removed"]}, snapshot.version)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        """Disconnect a slow subscriber."""
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[bytes]:
+        """Yield the current snapshot, then deltas (with heartbeats) until disconnect."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.add(queue)
+        try:
+            if self._snapshot_frame is not None:
+                yield self._snapshot_frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
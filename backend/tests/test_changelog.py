@@ -0,0 +1,55 @@
+"""Applying /retrieve?since= deltas must reproduce the current /retrieve payload."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import LocationChangelog, SnapshotStore  # noqa: E402
+
+
+def entry(kind: str, key: str, location: str, percent: float) -> dict:
+    return {"id": f"{kind}:{key}", "location": location, "percent_full": percent}
+
+
+def apply(locations: list, delta: dict) -> dict:
+    by_id = {item["id"]: item for item in locations}
+    for key in delta["removed"]:
+        del by_id[key]
+    for item in delta["added"] + delta["changed"]:
+        by_id[item["id"]] = item
+    return by_id
+
+
+def publish_all(payloads: list) -> LocationChangelog:
+    store, changelog = SnapshotStore(), LocationChangelog(maxlen=10)
+    store.add_listener(changelog.on_publish)
+    for locations in payloads:
+        store.publish({}, locations)
+    return changelog
+
+
+def test_events_sharing_a_venue_are_tracked_separately():
+    gyms = [entry("rec", "Rec Center", "Rec Center", 40.0), entry("library", "Evans", "Evans", 55.0)]
+    events = [entry("event", str(i), "MSC" if i % 2 else "Zachry", 10.0 + i) for i in range(30)]
+    v1 = gyms + events
+    v2 = gyms + events[:20]
+    v3 = [gyms[0], {**gyms[1], "percent_full": 60.0}] + events[:15] + [entry("event", "99", "MSC", 12.0)]
+
+    # The reported case: ten of the shared-venue events drop out.
+    delta = publish_all([v1, v2]).since(1, 2)
+    assert len(delta["removed"]) == 10
+    assert apply(v1, delta) == {item["id"]: item for item in v2}
+
+    payloads = [v1, v2, v3]
+    changelog = publish_all(payloads)
+    for since in (1, 2, 3):
+        delta = changelog.since(since, 3)
+        assert apply(payloads[since - 1], delta) == {item["id"]: item for item in v3}
+
+
+def test_duplicate_ids_fall_back_to_full():
+    v1 = [entry("event", "1", "MSC", 10.0)]
+    v2 = [entry("event", "1", "MSC", 10.0), entry("event", "1", "MSC", 20.0)]
+    changelog = publish_all([v1, v2])
+    assert changelog.since(1, 2) is None
@@ -0,0 +1,55 @@
+"""Table-driven checks of how parse_query reads ranking questions."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import RankingPlan, parse_query  # noqa: E402
+
+LIBRARY = frozenset({"library"})
+REC = frozenset({"rec"})
+
+CASES = [
+    ("quietest library", RankingPlan(LIBRARY)),
+    ("top 5 least crowded gyms", RankingPlan(REC, count=5)),
+    ("four emptiest libraries", RankingPlan(LIBRARY, count=4)),
+    ("busiest gym", RankingPlan(REC, busiest=True)),
+    ("most crowded gyms", RankingPlan(REC, busiest=True)),
+    ("gym with the most people", RankingPlan(REC, busiest=True)),
+    ("library with the highest occupancy", RankingPlan(LIBRARY, busiest=True)),
+    ("least packed gym", RankingPlan(REC)),
+    ("gym that is not packed", RankingPlan(REC)),
+    ("which gym isn't busy", RankingPlan(REC)),
+    ("library with the highest availability", RankingPlan(LIBRARY, by_seats=True)),
+    ("library with the highest number of open seats", RankingPlan(LIBRARY, by_seats=True)),
+    ("top 3 libraries by available seats", RankingPlan(LIBRARY, by_seats=True)),
+    ("which gyms are closed", RankingPlan(REC, closed=True)),
+    ("which gyms are not closed", RankingPlan(REC)),
+    ("which gyms are not open", RankingPlan(REC, closed=True)),
+    ("least busy gym for 2 people", RankingPlan(REC)),
+    ("2 quietest study spots", RankingPlan(LIBRARY, count=2)),
+    ("quietest library near the MSC", RankingPlan(LIBRARY, near="msc")),
+]
+
+DEFERRED = [
+    "busiest gym that is least crowded",
+    "least available library",
+    "gyms with no seats",
+    "quietest gym not near zachry",
+    "is the library open on sunday",
+    "quietest library at 5pm",
+    "what events are happening",
+]
+
+
+@pytest.mark.parametrize("query,plan", CASES)
+def test_parse_query(query, plan):
+    assert parse_query(query) == plan
+
+
+@pytest.mark.parametrize("query", DEFERRED)
+def test_ambiguous_or_unsupported_questions_go_to_the_llm(query):
+    assert parse_query(query) is None
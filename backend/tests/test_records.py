@@ -0,0 +1,23 @@
+"""Event ids served to clients must come back through /events/calendar-links unchanged."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_index import EventIndex  # noqa: E402
+from records import Event, from_rows, to_dicts, to_rows  # noqa: E402
+
+RAW = {"id": 10_042, "title": "Career fair", "location": "MSC", "ts_start": 1_760_000_000, "ts_end": 1_760_003_600, "href": "event/42"}
+
+
+def test_numeric_upstream_ids_round_trip_as_strings():
+    events = [Event.from_upstream(RAW), Event.from_upstream({**RAW, "id": None, "href": "event/43"})]
+    served = to_dicts(events)
+    assert served[0]["id"] == "10042"
+    assert served[1]["id"] is None
+
+    # What a client posts back is the served id; it must be a str and find the same event.
+    index = EventIndex(from_rows(Event, to_rows(events)))
+    assert isinstance(served[0]["id"], str)
+    assert index.by_key[served[0]["id"]].title == "Career fair"
@@ -0,0 +1,47 @@
+"""GridIndex.nearest must match a brute-force scan, including for query points far from the data."""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial import GridIndex, haversine_meters  # noqa: E402
+
+
+def campus_points(n: int) -> list:
+    rng = random.Random(7)
+    return [
+        {"name": f"p{i}", "lat": 30.60 + rng.uniform(0, 0.03), "lng": -96.36 + rng.uniform(0, 0.04), "open": i % 3 != 0}
+        for i in range(n)
+    ]
+
+
+def brute_force(points: list, lat: float, lng: float, k: int, predicate=None) -> list:
+    matching = [p for p in points if predicate is None or predicate(p)]
+    return sorted(matching, key=lambda p: haversine_meters(lat, lng, p["lat"], p["lng"]))[:k]
+
+
+def names(results: list) -> list:
+    return [point["name"] for _, point in results]
+
+
+def test_nearest_matches_brute_force_on_campus():
+    points = campus_points(300)
+    index = GridIndex(points)
+    for k in (1, 5, 50):
+        assert names(index.nearest(30.615, -96.34, k)) == [p["name"] for p in brute_force(points, 30.615, -96.34, k)]
+
+
+def test_distant_query_points_return_quickly():
+    points = campus_points(300)
+    index = GridIndex(points)
+    is_open = lambda p: p["open"]  # noqa: E731
+    for lat, lng in ((0.0, 0.0), (34.05, -118.24), (-33.87, 151.21)):
+        started = time.perf_counter()
+        # k above the number of matching points must not walk the whole globe either.
+        results = index.nearest(lat, lng, 500, is_open)
+        assert time.perf_counter() - started < 1
+        assert names(results) == [p["name"] for p in brute_force(points, lat, lng, 500, is_open)]
+        assert len(results) == sum(p["open"] for p in points)
@@ -3,6 +3,7 @@ import type { SuggestedCard } from "./types";
 export const BASE_API_URL = "http://142.93.69.165:8000";
 
 export type OccupancyRecord = {
+  id: string;
   location: string;
   percent_full: number;
 };
@@ -111,6 +112,33 @@ export async function fetchOccupancy(): Promise<OccupancyRecord[]> {
   }
 }
 
+export type SnapshotSection = "meta" | "locations" | "rec" | "libraries" | "events" | "places";
+
+export type SnapshotResponse = {
+  version: number;
+  meta?: { version: number; created_at: number; counts: Record<string, number> };
+  locations?: OccupancyRecord[];
+  rec?: Record<string, unknown>[];
+  libraries?: Record<string, unknown>[];
+  events?: Record<string, unknown>[];
+  places?: Record<string, unknown>[];
+};
+
+/**
+ * Fetches several views from one backend data version in a single request.
+ * Pass only the sections the screen renders to keep the payload small.
+ */
+export async function fetchSnapshot(sections?: SnapshotSection[]): Promise<SnapshotResponse> {
+  const query = sections && sections.length > 0 ? `?fields=${sections.join(",")}` : "";
+  const response = await fetch(`${BASE_API_URL}/snapshot${query}`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch snapshot (${response.status})`);
+  }
+
+  return (await response.json()) as SnapshotResponse;
+}
+
 export async function askPerplexity(query: string): Promise<string> {
   try {
     const response = await fetch(`${BASE_API_URL}/ask`, {
@@ -133,6 +161,63 @@ export async function askPerplexity(query: string): Promise<string> {
   }
 }
 
+/**
+ * Streams an /ask answer. `onToken` receives model output as it arrives so the UI can
+ * render progressively; the promise resolves with the validated JSON array string.
+ */
+export async function askPerplexityStream(
+  query: string,
+  onToken: (text: string) => void,
+  signal?: AbortSignal,
+): Promise<string> {
+  const response = await fetch(`${BASE_API_URL}/ask?stream=true`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ query: query }),
+    signal,
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to get response from Perplexity (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      const event = frame.match(/^event: (.*)$/m)?.[1];
+      const data = frame.match(/^data: (.*)$/m)?.[1];
+      if (!event || !data) {
+        continue;
+      }
+      const payload = JSON.parse(data) as { text?: string; response?: string };
+      if (event === "token" && payload.text) {
+        onToken(payload.text);
+      } else if (event === "result" && typeof payload.response === "string") {
+        return payload.response;
+      }
+    }
+  }
+
+  throw new Error("Perplexity stream ended without a result");
+}
+
 type CreateEventPayload = {
   text: string;
   start: string;   // e.g., "20251018T190000Z"